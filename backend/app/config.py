@@ -42,6 +42,12 @@ class Settings:
     # AI 設定
     AI_REQUEST_TIMEOUT: int = int(os.getenv("AI_REQUEST_TIMEOUT", "30"))
     PLAN_AUTO_DELETE_DAYS: int = int(os.getenv("PLAN_AUTO_DELETE_DAYS", "365"))
+    PLAN_CACHE_SIZE: int = int(os.getenv("PLAN_CACHE_SIZE", "128"))  # 0 で無効
+    PLAN_CACHE_TTL: int = int(os.getenv("PLAN_CACHE_TTL", "3600"))  # 秒
+    
+    # DBメンテナンス設定
+    DB_MAINTENANCE_INTERVAL: int = int(os.getenv("DB_MAINTENANCE_INTERVAL", "3600"))  # 秒（0 以下で無効）
+    HISTORY_ARCHIVE_DAYS: int = int(os.getenv("HISTORY_ARCHIVE_DAYS", "90"))
 
 
 settings = Settings()
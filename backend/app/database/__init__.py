@@ -2,6 +2,22 @@
 データベース パッケージ初期化
 """
 
-from .db import get_db, init_db, cleanup_old_plans, get_db_status
+from .db import (
+    get_db,
+    get_db_ro,
+    init_db,
+    cleanup_old_plans,
+    archive_old_history,
+    run_db_maintenance,
+    get_db_status,
+)
 
-__all__ = ["get_db", "init_db", "cleanup_old_plans", "get_db_status"]
+__all__ = [
+    "get_db",
+    "get_db_ro",
+    "init_db",
+    "cleanup_old_plans",
+    "archive_old_history",
+    "run_db_maintenance",
+    "get_db_status",
+]
@@ -2,23 +2,52 @@
 SQLiteデータベース設定
 """
 
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, inspect, event, delete, insert, select, literal_column
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
 from pathlib import Path
+from typing import Sequence, Tuple, Optional
 from ..models.db_models import Base
 
 # データベースパス
 DB_PATH = Path(__file__).parent.parent.parent / "data" / "database.db"
 
 # SQLAlchemy エンジン作成
+# - QueuePool: リクエストごとに別コネクションを払い出す（単一接続での直列化を回避）
+# - pool_use_lifo: 直近に使ったコネクションを優先して再利用（キャッシュが温かい）
 engine = create_engine(
     f"sqlite:///{DB_PATH}",
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    pool_size=10,
+    max_overflow=20,
+    pool_use_lifo=True,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    query_cache_size=1200,  # コンパイル済みSQLのキャッシュ件数
     echo=False  # SQLログ出力（開発時はTrue）
 )
 
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragma(dbapi_connection, connection_record) -> None:
+    """
+    新規コネクション作成時に SQLite の PRAGMA を設定
+    - WAL: 読み込みと書き込みを並行実行可能にする
+    - synchronous=NORMAL: WAL 使用時は安全性を保ったまま fsync を削減
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.close()
+
+# IN (...) 句1文あたりのパラメータ数（SQLite のホストパラメータ上限 999 未満）
+IN_CLAUSE_CHUNK_SIZE = 500
+
+# テーブル名キャッシュ（init_db / 明示的なリフレッシュ時のみ更新）
+_TABLES: Optional[Tuple[str, ...]] = None
+
 # セッション作成
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -26,6 +55,14 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# 読み取り専用セッション（AUTOCOMMIT: BEGIN/ROLLBACK を発行しない）
+RoEngine = engine.execution_options(isolation_level="AUTOCOMMIT")
+SessionRo = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=RoEngine
+)
+
 
 def get_db() -> Session:
     """
@@ -43,23 +80,55 @@ def get_db() -> Session:
         db.close()
 
 
+def get_db_ro() -> Session:
+    """
+    依存性注入用: 読み取り専用データベースセッション取得
+    
+    書き込みを行わない GET エンドポイントで使用する
+    
+    Usage in FastAPI:
+        @app.get("/endpoint")
+        async def endpoint(db: Session = Depends(get_db_ro)):
+            ...
+    """
+    db = SessionRo()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def init_db() -> None:
     """
     データベース初期化
     - テーブルが存在しない場合は作成
     - 既存テーブルには影響なし
+    - テーブル・インデックスが揃っている場合（ウォームスタート）はリフレクションを省略
     """
+    global _TABLES
     print("🔧 データベース初期化中...")
     
+    # ウォームスタート: sqlite_master の1クエリで確認のみ
+    if DB_PATH.exists():
+        existing = _sqlite_master_names()
+        if _expected_schema_names() <= existing["table"] | existing["index"]:
+            _TABLES = tuple(sorted(existing["table"]))
+            print(f"✅ データベース確認完了: {', '.join(_TABLES)}")
+            return
+    
     # データベースディレクトリ作成
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     
     # テーブル作成
     Base.metadata.create_all(bind=engine)
     
-    # 確認
-    inspector = inspect(engine)
-    tables = inspector.get_table_names()
+    # 既存テーブルに後から追加したインデックスを作成
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    # 確認（テーブル名をキャッシュ）
+    tables = _refresh_table_cache()
     
     if tables:
         print(f"✅ テーブル作成完了: {', '.join(tables)}")
@@ -67,6 +136,64 @@ def init_db() -> None:
         print("⚠️  テーブルが作成されていません")
 
 
+def _sqlite_master_names() -> dict:
+    """
+    sqlite_master から既存のテーブル名・インデックス名を取得
+    
+    Returns:
+        dict: {"table": set, "index": set}
+    """
+    names = {"table": set(), "index": set()}
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            "SELECT type, name FROM sqlite_master "
+            "WHERE type IN ('table', 'index') AND name NOT LIKE 'sqlite_%'"
+        )
+        for obj_type, name in rows:
+            names[obj_type].add(name)
+    return names
+
+
+def _expected_schema_names() -> set:
+    """モデル定義上のテーブル名・インデックス名"""
+    names = set(Base.metadata.tables)
+    for table in Base.metadata.tables.values():
+        names.update(index.name for index in table.indexes)
+    return names
+
+
+def chunked_in_delete(
+    db: Session,
+    model,
+    column,
+    ids: Sequence,
+    chunk: int = IN_CLAUSE_CHUNK_SIZE
+) -> int:
+    """
+    IN (...) 句を分割して一括削除
+    
+    SQLite のホストパラメータ上限（デフォルト999）を超えないよう、
+    chunk 件ずつ DELETE を発行する。トランザクション制御は呼び出し側で行う。
+    
+    Args:
+        db (Session): DBセッション
+        model: 削除対象のモデル
+        column: IN 句で比較するカラム
+        ids (Sequence): 削除対象の値リスト
+        chunk (int): 1文あたりのパラメータ数
+        
+    Returns:
+        int: 削除した行数
+    """
+    deleted = 0
+    for i in range(0, len(ids), chunk):
+        result = db.execute(
+            delete(model).where(column.in_(ids[i:i + chunk]))
+        )
+        deleted += result.rowcount
+    return deleted
+
+
 def cleanup_old_plans(days: int = 365) -> int:
     """
     古いプランを自動削除
@@ -78,24 +205,31 @@ def cleanup_old_plans(days: int = 365) -> int:
         int: 削除したプラン数
     """
     from datetime import datetime, timedelta
-    from ..models.db_models import TravelPlanDB
+    from ..models.db_models import TravelPlanDB, TimelineItemHistory, TimelineItemHistoryArchive
     
     db = SessionLocal()
     try:
         cutoff_date = datetime.now() - timedelta(days=days)
         
-        # 削除対象を検索
-        old_plans = db.query(TravelPlanDB).filter(
-            TravelPlanDB.created_at < cutoff_date
-        ).all()
-        
-        delete_count = len(old_plans)
-        
-        # 削除実行
-        for plan in old_plans:
-            db.delete(plan)
+        with db.begin():
+            # 削除対象の plan_id のみ取得（ORMオブジェクトは生成しない）
+            plan_ids = db.execute(
+                select(TravelPlanDB.plan_id).where(
+                    TravelPlanDB.created_at < cutoff_date
+                )
+            ).scalars().all()
+            
+            # 編集履歴（アーカイブ含む） → プランの順に一括削除
+            chunked_in_delete(db, TimelineItemHistory, TimelineItemHistory.plan_id, plan_ids)
+            chunked_in_delete(
+                db, TimelineItemHistoryArchive, TimelineItemHistoryArchive.plan_id, plan_ids
+            )
+            delete_count = chunked_in_delete(db, TravelPlanDB, TravelPlanDB.plan_id, plan_ids)
         
-        db.commit()
+        # サービスを経由しない削除のため概算プラン数のキャッシュを破棄
+        if delete_count:
+            from ..services.plan_storage_service import PlanStorageService
+            PlanStorageService.invalidate_count_cache(engine)
         
         print(f"✅ 削除完了: {delete_count}個の古いプランを削除しました")
         return delete_count
@@ -108,18 +242,109 @@ def cleanup_old_plans(days: int = 365) -> int:
         db.close()
 
 
-def get_db_status() -> dict:
+def _refresh_table_cache() -> Tuple[str, ...]:
+    """
+    DBをリフレクションしてテーブル名キャッシュを更新
+    
+    Returns:
+        Tuple[str, ...]: テーブル名
+    """
+    global _TABLES
+    _TABLES = tuple(inspect(engine).get_table_names())
+    return _TABLES
+
+
+def archive_old_history(days: int = 90) -> int:
+    """
+    古い編集履歴をアーカイブテーブルへ移動
+    
+    IN_CLAUSE_CHUNK_SIZE 件ずつ INSERT ... SELECT と DELETE を
+    1トランザクションで実行し、1回のロック時間を短く保つ
+    
+    Args:
+        days (int): この日数以上古い履歴を移動（デフォルト: 90日）
+        
+    Returns:
+        int: 移動した履歴数
+    """
+    from datetime import datetime, timedelta
+    from ..models.db_models import TimelineItemHistory, TimelineItemHistoryArchive
+    
+    cutoff_date = datetime.now() - timedelta(days=days)
+    # id は旧形式（TEXT）と新形式（BLOB）が混在しうるため rowid で指定
+    rowid = literal_column("rowid")
+    columns = [c.name for c in TimelineItemHistoryArchive.__table__.columns]
+    
+    db = SessionLocal()
+    try:
+        rowids = db.execute(
+            select(rowid).select_from(TimelineItemHistory).where(
+                TimelineItemHistory.created_at < cutoff_date
+            )
+        ).scalars().all()
+        db.rollback()  # 読み取り用の暗黙トランザクションを終了
+        
+        moved = 0
+        for i in range(0, len(rowids), IN_CLAUSE_CHUNK_SIZE):
+            chunk = rowids[i:i + IN_CLAUSE_CHUNK_SIZE]
+            with db.begin():
+                db.execute(
+                    insert(TimelineItemHistoryArchive).from_select(
+                        columns,
+                        select(*[TimelineItemHistory.__table__.c[name] for name in columns])
+                        .where(rowid.in_(chunk))
+                    )
+                )
+                result = db.execute(
+                    delete(TimelineItemHistory.__table__).where(rowid.in_(chunk))
+                )
+                moved += result.rowcount
+        
+        if moved:
+            print(f"✅ アーカイブ完了: {moved}件の編集履歴を移動しました")
+        return moved
+        
+    except Exception as e:
+        db.rollback()
+        print(f"❌ エラー: {str(e)}")
+        return 0
+    finally:
+        db.close()
+
+
+def checkpoint_wal() -> None:
+    """WAL の内容を本体DBに書き戻し、WAL ファイルを切り詰める"""
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def run_db_maintenance(archive_days: int = 90) -> None:
+    """
+    定期DBメンテナンス
+    - 古い編集履歴のアーカイブ
+    - WAL チェックポイント
+    """
+    archive_old_history(archive_days)
+    checkpoint_wal()
+
+
+def get_db_status(refresh: bool = False) -> dict:
     """
     データベースの状態確認
     
+    Args:
+        refresh (bool): True の場合はテーブル名を再取得（リフレクション実行）
+    
     Returns:
         dict: テーブル情報など
     """
-    inspector = inspect(engine)
+    tables = _TABLES
+    if refresh or tables is None:
+        tables = _refresh_table_cache()
     
     return {
         "database": str(DB_PATH),
         "exists": DB_PATH.exists(),
-        "tables": inspector.get_table_names(),
-        "table_count": len(inspector.get_table_names())
+        "tables": list(tables),
+        "table_count": len(tables)
     }
@@ -3,42 +3,98 @@
 FastAPI アプリケーションの初期化と設定
 """
 
-from fastapi import FastAPI
+import asyncio
+import contextlib
+import re
+import stat
+import anyio
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, Response
+from fastapi.responses import FileResponse, Response, ORJSONResponse
+from starlette.datastructures import Headers
 from pathlib import Path
 from contextlib import asynccontextmanager
-from .database.db import init_db
+from .database.db import init_db, run_db_maintenance
 from .routes import storage, plan
+from .services.gemini_service import configure_gemini
+from .services.weather_service import get_weather_service
 from .config import settings # 設定をインポート
+from .utils.exceptions import GeminiAPIError
+
+
+async def _periodic_maintenance() -> None:
+    """定期DBメンテナンス（履歴アーカイブ・WAL チェックポイント）"""
+    while True:
+        await asyncio.sleep(settings.DB_MAINTENANCE_INTERVAL)
+        
+        # スレッド側の処理はキャンセルできないため、停止要求が来ても完了を待ってから終了する
+        run = asyncio.ensure_future(
+            asyncio.to_thread(run_db_maintenance, settings.HISTORY_ARCHIVE_DAYS)
+        )
+        try:
+            await asyncio.shield(run)
+        except asyncio.CancelledError:
+            with contextlib.suppress(Exception):
+                await run
+            raise
+        except Exception as e:
+            print(f"❌ DBメンテナンスエラー: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """アプリケーションのライフサイクル管理"""
-    try:
-        # APIキーが読み込めているか確認（最初の数文字を表示）
-        key_hint = settings.GEMINI_API_KEY[:5] if settings.GEMINI_API_KEY else "None"
-        print(f"🔑 API Key Check: {key_hint}...")
-    except ImportError as e:
-        print(f"❌ インポートエラー: {e}")
+    """アプリケーションのライフサイクル管理（起動処理はここに集約）"""
     # Startup イベント
+    # APIキーが読み込めているか確認（最初の数文字を表示）
+    key_hint = settings.GEMINI_API_KEY[:5] if settings.GEMINI_API_KEY else "None"
+    print(f"🔑 API Key Check: {key_hint}...")
+    
+    if settings.GEMINI_API_KEY:
+        configure_gemini()
     init_db()
+    # 実行間隔が 0 以下の場合は定期メンテナンスを無効にする（待機なしで回り続けないように）
+    maintenance_task = None
+    if settings.DB_MAINTENANCE_INTERVAL > 0:
+        maintenance_task = asyncio.create_task(_periodic_maintenance())
     yield
     # Shutdown イベント
-    pass
-
-   
+    if maintenance_task is not None:
+        maintenance_task.cancel()
+        # 実行中のメンテナンスの終了を待ってから停止する
+        with contextlib.suppress(asyncio.CancelledError):
+            await maintenance_task
+    # 使用された（生成済みの）天気サービスのみクローズする
+    if get_weather_service.cache_info().currsize:
+        await get_weather_service().aclose()
 
 
 app = FastAPI(
     title="AI旅行プランナー API",
     description="ユーザーの予算、興味、スケジュールに合わせて最適な旅行プランを自動生成します",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+@app.exception_handler(GeminiAPIError)
+async def gemini_api_error_handler(request: Request, exc: GeminiAPIError) -> ORJSONResponse:
+    """
+    ルート外（依存関係の解決時など）で発生した Gemini API エラーを 503 に変換
+    
+    例: GEMINI_API_KEY 未設定時の get_plan_generator()
+    """
+    return ORJSONResponse(
+        status_code=503,
+        content={"detail": f"AI プラン生成エラー: {str(exc)}"}
+    )
+
+
+# レスポンス圧縮 - プラン詳細・一覧の JSON など 1KB 以上のレスポンスを gzip
+# （Content-Encoding 設定済みの事前圧縮ファイルはそのまま返される）
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # CORS設定 - フロントエンドからのリクエストを許可
 app.add_middleware(
     CORSMiddleware,
@@ -55,6 +111,49 @@ app.include_router(storage.router)
 app.include_router(plan.router)
 
 
+class CachedStaticFiles(StaticFiles):
+    """
+    キャッシュヘッダー・事前圧縮ファイル対応の StaticFiles
+    
+    - ファイル名にハッシュを含むアセット（例: app.3f9a1c2b.js）は長期キャッシュ
+    - それ以外は ETag / Last-Modified による再検証（no-cache）
+    - Accept-Encoding に応じて .br / .gz の事前圧縮ファイルがあれば優先して返す
+    """
+    
+    HASHED_ASSET_PATTERN = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+    PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+    
+    async def get_response(self, path: str, scope) -> Response:
+        response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        
+        if self.HASHED_ASSET_PATTERN.search(path):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+    
+    async def _precompressed_response(self, path: str, scope):
+        """事前圧縮ファイル（.br / .gz）があればそのレスポンスを返す"""
+        if scope["method"] not in ("GET", "HEAD") or not path or path.endswith("/"):
+            return None
+        
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        for encoding, suffix in self.PRECOMPRESSED_SUFFIXES:
+            if encoding not in accept_encoding:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(
+                self.lookup_path, path + suffix
+            )
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["Content-Encoding"] = encoding
+                response.headers["Vary"] = "Accept-Encoding"
+                return response
+        return None
+
+
 # フロントエンド静的ファイルを配信（最後にマウント - 全パスをキャッチするため）
 project_root = Path(__file__).resolve().parent.parent.parent
 frontend_path = project_root / "frontend"
@@ -77,7 +176,7 @@ async def serve_index():
 
 if frontend_path.exists():
     print("✅ Frontend directory found. Mounting static files.")
-    app.mount("/", StaticFiles(directory=str(frontend_path), html=True), name="frontend")
+    app.mount("/", CachedStaticFiles(directory=str(frontend_path), html=True), name="frontend")
 else:
     print("⚠️ Frontend directory NOT found. Web interface will not be available.")
 
@@ -3,7 +3,7 @@
 """
 
 from .travel_plan import TravelInput, TimelineItem, DaySchedule, TravelPlan
-from .db_models import TravelPlanDB, TimelineItemHistory, Base
+from .db_models import TravelPlanDB, TimelineItemHistory, TimelineItemHistoryArchive, Base
 
 __all__ = [
     "TravelInput",
@@ -12,5 +12,6 @@ __all__ = [
     "TravelPlan",
     "TravelPlanDB",
     "TimelineItemHistory",
+    "TimelineItemHistoryArchive",
     "Base",
 ]
@@ -2,14 +2,72 @@
 SQLAlchemy ORM データモデル
 """
 
-from sqlalchemy import Column, String, Integer, DateTime, JSON
+from sqlalchemy import Column, String, Integer, DateTime, Text, LargeBinary, Index
+from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
-from datetime import datetime
 import uuid
+import orjson
 
 Base = declarative_base()
 
 
+def _local_now():
+    """
+    DB側で現在時刻（ローカル時刻・ミリ秒精度）を生成するSQL式
+    
+    func.now() (CURRENT_TIMESTAMP) は UTC かつ秒精度のため、
+    既存データ（Python側のローカル時刻で保存）と揃えて strftime を使用。
+    文字列比較が正しく行えるよう、SQLAlchemy の保存形式（マイクロ秒6桁）に合わせる
+    """
+    return func.strftime("%Y-%m-%d %H:%M:%f000", "now", "localtime")
+
+
+class OrjsonJSON(TypeDecorator):
+    """
+    orjson でシリアライズする JSON カラム型
+    
+    SQLite では JSON も TEXT として保存されるため、既存データとの互換性あり
+    """
+    
+    impl = Text
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return orjson.dumps(value).decode()
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return orjson.loads(value)
+
+
+class UUIDBinary(TypeDecorator):
+    """
+    UUID を16バイトの BLOB として保存するカラム型
+    
+    Python 側では従来どおり文字列（"xxxxxxxx-xxxx-..."）として扱える。
+    変更前に TEXT で保存された既存行はそのまま文字列として返す。
+    """
+    
+    impl = LargeBinary(16)
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, uuid.UUID):
+            return value.bytes
+        return uuid.UUID(value).bytes
+    
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        return str(uuid.UUID(bytes=value))
+
+
 class TravelPlanDB(Base):
     """
     旅行プラン永続化モデル
@@ -23,37 +81,53 @@ class TravelPlanDB(Base):
     
     __tablename__ = "travel_plans"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
     plan_id = Column(String(36), unique=True, nullable=False, index=True)
     
     # 入力条件（JSON保存）
-    input_data = Column(JSON, nullable=False)
+    input_data = Column(OrjsonJSON, nullable=False)
     
     # 生成されたスケジュール
-    schedules = Column(JSON, nullable=False)
+    schedules = Column(OrjsonJSON, nullable=False)
     
     # 集計データ
     total_cost = Column(Integer, nullable=False, default=0)
     total_duration = Column(Integer, nullable=False, default=0)  # 分単位
     
     # タイムスタンプ
-    created_at = Column(DateTime, nullable=False, default=datetime.now)
-    updated_at = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+    created_at = Column(DateTime, nullable=False, default=_local_now(), server_default=_local_now())
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        default=_local_now(),
+        server_default=_local_now(),
+        onupdate=_local_now()
+    )
+    
+    # 一覧取得（最新順）用インデックス
+    __table_args__ = (
+        Index("ix_travel_plans_created_at_desc", created_at.desc()),
+    )
     
     def __repr__(self):
         return f"<TravelPlanDB(plan_id={self.plan_id}, created_at={self.created_at})>"
     
-    def to_dict(self):
-        """辞書形式に変換"""
+    def to_summary_dict(self):
+        """一覧表示用の辞書形式に変換（schedules にはアクセスしない）"""
         return {
             "plan_id": self.plan_id,
             "input_data": self.input_data,
-            "schedules": self.schedules,
             "total_cost": self.total_cost,
             "total_duration": self.total_duration,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+    
+    def to_dict(self):
+        """辞書形式に変換"""
+        data = self.to_summary_dict()
+        data["schedules"] = self.schedules
+        return data
 
 
 class TimelineItemHistory(Base):
@@ -66,8 +140,8 @@ class TimelineItemHistory(Base):
     
     __tablename__ = "timeline_item_history"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    plan_id = Column(String(36), nullable=False, index=True)
+    id = Column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
+    plan_id = Column(String(36), nullable=False)  # 下記の複合インデックスで検索
     
     # 編集対象の位置
     day = Column(Integer, nullable=False)  # 旅行の何日目か
@@ -82,12 +156,24 @@ class TimelineItemHistory(Base):
         # "insert" = アイテム追加
     )
     
-    original_data = Column(JSON)  # 変更前データ（deleteなら削除前）
-    updated_data = Column(JSON)   # 変更後データ（insertなら追加データ）
+    original_data = Column(OrjsonJSON)  # 変更前データ（deleteなら削除前）
+    updated_data = Column(OrjsonJSON)   # 変更後データ（insertなら追加データ）
     
     # メタデータ
     field_changed = Column(String(50))  # 変更されたフィールド名（update時のみ）
-    created_at = Column(DateTime, nullable=False, default=datetime.now, index=True)
+    created_at = Column(
+        DateTime,
+        nullable=False,
+        default=_local_now(),
+        server_default=_local_now(),
+        index=True
+    )
+    
+    # プラン別・日別の履歴取得（最新順）用インデックス
+    __table_args__ = (
+        Index("ix_timeline_item_history_plan_created", plan_id, created_at.desc()),
+        Index("ix_timeline_item_history_plan_day_created", plan_id, day, created_at.desc()),
+    )
     
     def __repr__(self):
         return f"<TimelineItemHistory(plan_id={self.plan_id}, operation={self.operation_type}, created_at={self.created_at})>"
@@ -105,3 +191,28 @@ class TimelineItemHistory(Base):
             "updated_data": self.updated_data,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class TimelineItemHistoryArchive(Base):
+    """
+    アイテム編集履歴アーカイブモデル
+    
+    TimelineItemHistory と同一スキーマ。一定期間を過ぎた履歴を移動し、
+    履歴テーブル本体とそのインデックスを小さく保つ
+    （インデックスは plan_id のみ）
+    """
+    
+    __tablename__ = "timeline_item_history_archive"
+    
+    id = Column(UUIDBinary, primary_key=True)
+    plan_id = Column(String(36), nullable=False, index=True)
+    day = Column(Integer, nullable=False)
+    item_index = Column(Integer, nullable=False)
+    operation_type = Column(String(20), nullable=False)
+    original_data = Column(OrjsonJSON)
+    updated_data = Column(OrjsonJSON)
+    field_changed = Column(String(50))
+    created_at = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<TimelineItemHistoryArchive(plan_id={self.plan_id}, operation={self.operation_type}, created_at={self.created_at})>"
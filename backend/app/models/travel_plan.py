@@ -2,22 +2,39 @@
 旅行プラン関連のデータモデル
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, model_validator
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from datetime import date, datetime
 import uuid
 
+# 日付文字列の形式（YYYY-MM-DD）
+_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+
 
 class TravelInput(BaseModel):
     """旅行入力条件"""
     origin: str = Field(..., description="出発地")
     destination: str = Field(..., description="目的地")
-    start_date: str = Field(..., description="開始日（YYYY-MM-DD形式）")
-    end_date: str = Field(..., description="終了日（YYYY-MM-DD形式）")
+    start_date: str = Field(..., description="開始日（YYYY-MM-DD形式）", pattern=_DATE_PATTERN)
+    end_date: str = Field(..., description="終了日（YYYY-MM-DD形式）", pattern=_DATE_PATTERN)
     budget: int = Field(..., description="予算（円）")
     interests: List[str] = Field(default_factory=list, description="興味・関心のキーワード")
     additional_notes: Optional[str] = Field(None, description="追加の要望")
 
+    @model_validator(mode="after")
+    def _check_dates(self) -> "TravelInput":
+        """日付の妥当性と順序を検証（形式は Field の pattern で検証済み）"""
+        try:
+            start = date.fromisoformat(self.start_date)
+            end = date.fromisoformat(self.end_date)
+        except ValueError:
+            raise ValueError("存在しない日付が指定されています") from None
+        
+        if end < start:
+            raise ValueError("終了日は開始日以降である必要があります")
+        
+        return self
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -106,3 +123,7 @@ class TravelPlan(BaseModel):
                 "created_at": "2025-01-01T12:00:00"
             }
         }
+
+
+# schedules 配列をまとめて検証・シリアライズするアダプタ（インポート時に一度だけ構築）
+DAY_SCHEDULES_ADAPTER = TypeAdapter(List[DaySchedule])
@@ -2,11 +2,11 @@
 旅行プラン生成関連のAPIルート
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 import logging
 from typing import List
 from app.models.travel_plan import TravelInput, TravelPlan
-from app.services.plan_generator import get_plan_generator
+from app.services.plan_generator import get_plan_generator, PlanGeneratorService
 from app.utils.exceptions import GeminiAPIError, ValidationError
 
 router = APIRouter(prefix="/api/plans", tags=["plans"])
@@ -14,12 +14,16 @@ logger = logging.getLogger(__name__)
 
 
 @router.post("", response_model=TravelPlan)
-async def generate_plan(travel_input: TravelInput) -> TravelPlan:
+async def generate_plan(
+    travel_input: TravelInput,
+    plan_generator: PlanGeneratorService = Depends(get_plan_generator)
+) -> TravelPlan:
     """
     旅行プランを生成
     
     Args:
         travel_input (TravelInput): 旅行条件入力
+        plan_generator (PlanGeneratorService): プラン生成サービス（DI）
         
     Returns:
         TravelPlan: 生成された旅行プラン
@@ -28,7 +32,6 @@ async def generate_plan(travel_input: TravelInput) -> TravelPlan:
         HTTPException: プラン生成エラー時
     """
     try:
-        plan_generator = get_plan_generator()
         travel_plan = await plan_generator.generate_plan(travel_input)
         return travel_plan
         
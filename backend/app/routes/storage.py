@@ -2,9 +2,12 @@
 プラン保存・履歴管理エンドポイント
 """
 
+from datetime import datetime
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from ..database.db import get_db
+from ..database.db import get_db, get_db_ro
 from ..models.travel_plan import TravelPlan
 from ..services.plan_storage_service import plan_storage_service
 from ..services.history_service import history_service
@@ -23,17 +26,10 @@ async def save_plan(
     フロントエンドの「保存」ボタン押下時に呼び出されます。
     """
     try:
-        # 既に存在するか確認
-        try:
-            await plan_storage_service.get_plan(plan.plan_id, db)
-            # 存在する場合は更新
-            await plan_storage_service.update_plan(plan.plan_id, plan, db)
-            message = "プランを更新しました"
-        except PlanNotFoundError:
-            # 存在しない場合は新規保存
-            await plan_storage_service.save_plan(plan, db)
-            message = "プランを保存しました"
-            
+        # 新規保存 or 更新を1クエリで実行
+        created = await plan_storage_service.upsert_plan(plan, db)
+        message = "プランを保存しました" if created else "プランを更新しました"
+        
         return {
             "success": True,
             "message": message,
@@ -43,18 +39,22 @@ async def save_plan(
         raise HTTPException(status_code=500, detail=f"保存エラー: {str(e)}")
 
 
-@router.get("/plans/history")
+@router.get("/plans/history", response_class=ORJSONResponse, response_model=None)
 async def get_plans_history(
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    before: Optional[datetime] = Query(None),
+    before_id: Optional[str] = Query(None),
+    db: Session = Depends(get_db_ro)
 ):
     """
     保存済みプラン一覧取得（最新順）
     
     Query Parameters:
         limit (int): 取得件数（1-100、デフォルト: 10）
-        offset (int): オフセット（デフォルト: 0）
+        offset (int): オフセット（非推奨: before 未指定時のみ使用、デフォルト: 0）
+        before (datetime): 前ページの next_cursor.before
+        before_id (str): 前ページの next_cursor.before_id
     
     Response:
         {
@@ -70,27 +70,46 @@ async def get_plans_history(
                 }
             ],
             "count": 1,
-            "total": 1
+            "total": 1,
+            "next_cursor": {
+                "before": "2025-12-27T12:00:00",
+                "before_id": "uuid"
+            }
         }
+        次ページがない場合 next_cursor は null
     """
     try:
-        plans = await plan_storage_service.get_all_plans(db, limit, offset)
-        total_count = await plan_storage_service.count_plans(db)
+        # 保存済みJSONをそのまま埋め込む（デコード・再エンコードを省略）
+        # 一覧では schedules を使わないため読み込まない
+        plans = await plan_storage_service.get_all_plans(
+            db, limit, offset, before=before, before_id=before_id,
+            raw_json=True, include_schedules=False
+        )
+        total_count = await plan_storage_service.count_plans(db, approximate=True)
         
-        return {
+        next_cursor = None
+        if len(plans) == limit:
+            last = plans[-1]
+            next_cursor = {
+                "before": last["created_at"],
+                "before_id": last["plan_id"]
+            }
+        
+        return ORJSONResponse({
             "success": True,
             "data": plans,
             "count": len(plans),
-            "total": total_count
-        }
+            "total": total_count,
+            "next_cursor": next_cursor
+        })
     except DatabaseError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/plans/{plan_id}")
+@router.get("/plans/{plan_id}", response_class=ORJSONResponse, response_model=None)
 async def get_plan(
     plan_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_ro)
 ):
     """
     プラン詳細取得
@@ -107,16 +126,18 @@ async def get_plan(
                 "schedules": [...],
                 "total_cost": 50000,
                 "total_duration": 1440,
-                "created_at": "2025-12-27T12:00:00"
+                "created_at": "2025-12-27T12:00:00",
+                "updated_at": "2025-12-27T12:00:00"
             }
         }
     """
     try:
-        plan = await plan_storage_service.get_plan(plan_id, db)
-        return {
+        # DB行の辞書をそのまま返す（Pydantic再構築・jsonable_encoderを省略）
+        plan = await plan_storage_service.get_plan_raw(plan_id, db)
+        return ORJSONResponse({
             "success": True,
-            "data": plan.dict()
-        }
+            "data": plan
+        })
     except PlanNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except DatabaseError as e:
@@ -156,7 +177,7 @@ async def delete_plan(
 async def get_plan_history(
     plan_id: str,
     limit: int = Query(50, ge=1, le=500),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_ro)
 ):
     """
     プラン編集履歴取得
@@ -205,10 +226,16 @@ async def get_plan_history(
 
 
 @router.get("/status")
-async def get_storage_status(db: Session = Depends(get_db)):
+async def get_storage_status(
+    refresh: bool = Query(False),
+    db: Session = Depends(get_db_ro)
+):
     """
     ストレージ状態確認
     
+    Query Parameters:
+        refresh (bool): テーブル情報・プラン数を再取得する（デフォルト: false）
+    
     Response:
         {
             "success": true,
@@ -222,13 +249,13 @@ async def get_storage_status(db: Session = Depends(get_db)):
     try:
         from ..database.db import get_db_status
         
-        total_plans = await plan_storage_service.count_plans(db)
+        total_plans = await plan_storage_service.count_plans(db, approximate=not refresh)
         
         return {
             "success": True,
             "data": {
                 "total_plans": total_plans,
-                "database_status": get_db_status()
+                "database_status": get_db_status(refresh)
             }
         }
     except Exception as e:
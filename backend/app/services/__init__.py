@@ -4,12 +4,13 @@
 
 from .plan_storage_service import plan_storage_service, PlanStorageService
 from .history_service import history_service, HistoryService
-from .plan_generator import plan_generator
+from .plan_generator import get_plan_generator, PlanGeneratorService
 
 __all__ = [
     "plan_storage_service",
     "PlanStorageService",
     "history_service",
     "HistoryService",
-    "plan_generator",
+    "get_plan_generator",
+    "PlanGeneratorService",
 ]
@@ -2,11 +2,63 @@
 Gemini API通信サービス
 """
 
-import asyncio
-import google.generativeai as genai
+from functools import lru_cache
+from typing import TYPE_CHECKING
 from app.config import settings
 from ..utils.exceptions import GeminiAPIError
 
+if TYPE_CHECKING:
+    import google.generativeai as genai
+
+# google.generativeai は grpc / protobuf を読み込むためインポートに時間がかかる。
+# モジュール先頭では読み込まず、実際に使う関数内でインポートする
+# （APIキー設定時は lifespan の configure_gemini() で起動時に読み込まれる）
+
+# 安定性の高い最新モデルを使用
+GEMINI_MODEL_NAME = 'gemini-2.5-flash'
+
+# 生成パラメータ（デフォルト）
+DEFAULT_TEMPERATURE = 0.7
+DEFAULT_MAX_OUTPUT_TOKENS = 8192
+
+
+@lru_cache(maxsize=1)
+def configure_gemini() -> None:
+    """
+    Gemini API キーを設定（プロセス内で一度だけ実行）
+    
+    アプリ起動時（lifespan）に呼び出される。GeminiService 生成時にも
+    呼び出すが、2回目以降はキャッシュにより何もしない。
+    """
+    import google.generativeai as genai
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+
+
+@lru_cache(maxsize=1)
+def get_generative_model() -> "genai.GenerativeModel":
+    """
+    GenerativeModel を取得（プロセス内で共有）
+    
+    SDK のクライアント（gRPC チャネル）はプロセス共通のため、
+    モデルも1つだけ生成して接続を使い回す
+    """
+    import google.generativeai as genai
+    configure_gemini()
+    return genai.GenerativeModel(GEMINI_MODEL_NAME)
+
+
+@lru_cache(maxsize=16)
+def _generation_config(
+    temperature: float,
+    max_output_tokens: int
+) -> "genai.types.GenerationConfig":
+    """生成設定を取得（パラメータごとに一度だけ生成して再利用）"""
+    import google.generativeai as genai
+    return genai.types.GenerationConfig(
+        temperature=temperature,
+        max_output_tokens=max_output_tokens
+    )
+
 
 class GeminiService:
     """Gemini API通信管理"""
@@ -14,13 +66,11 @@ class GeminiService:
     def __init__(self):
         """初期化"""
         if not settings.GEMINI_API_KEY:
-            raise ValueError("GEMINI_API_KEY環境変数が設定されていません")
+            raise GeminiAPIError("GEMINI_API_KEY環境変数が設定されていません")
         
         # Gemini APIの初期化
         try:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            # 安定性の高い最新モデルを使用
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
+            self.model = get_generative_model()
         except Exception as e:
             raise GeminiAPIError(f"Gemini API 初期化エラー: {str(e)}")
         
@@ -42,38 +92,45 @@ class GeminiService:
             from .prompts.travel_plan_prompt import create_travel_prompt
             prompt = create_travel_prompt(travel_input)
             
-            # API呼び出しをスレッドで実行
-            response = await asyncio.to_thread(
-                self.model.generate_content,
+            # API呼び出し（ストリーミング: 生成済みのチャンクから順に受信）
+            response = await self.model.generate_content_async(
                 prompt,
-                generation_config={
-                    'temperature': 0.7,
-                    'max_output_tokens': 8192,  
-            }
-)
+                generation_config=_generation_config(
+                    DEFAULT_TEMPERATURE,
+                    DEFAULT_MAX_OUTPUT_TOKENS
+                ),
+                stream=True
+            )
+            
+            # チャンクのテキスト片を集め、最後に1回だけ結合
+            text_parts = []
+            async for chunk in response:
+                if not chunk.candidates:
+                    continue
+                text_parts.extend(
+                    part.text for part in chunk.candidates[0].content.parts
+                    if part.text
+                )
+            text = "".join(text_parts)
             
-            if not response or not hasattr(response, 'text') or not response.text:
+            if not text:
                 raise GeminiAPIError("API から有効なテキストレスポンスが得られませんでした")
             
             # ログ保存（オプション）
             try:
                 from ..utils.json_handler import save_gemini_log
-                await save_gemini_log(plan_id, prompt, {"text": response.text})
+                await save_gemini_log(plan_id, prompt, {"text": text})
             except:
                 pass # ログ失敗は無視して続行
                 
-            return response.text
+            return text
         
         except Exception as e:
             # ここで発生したエラーが plan.py に伝わり、503エラーの原因になります
             raise GeminiAPIError(f"旅行プラン生成エラー: {type(e).__name__}: {str(e)}")
 
-# インスタンス管理用
-_gemini_service = None
-
+# インスタンス管理用（初回呼び出し時に一度だけ生成）
+@lru_cache(maxsize=1)
 def get_gemini_service() -> GeminiService:
     """Gemini Service インスタンスを取得"""
-    global _gemini_service
-    if _gemini_service is None:
-        _gemini_service = GeminiService()
-    return _gemini_service
\ No newline at end of file
+    return GeminiService()
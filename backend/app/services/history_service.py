@@ -2,10 +2,10 @@
 編集履歴管理サービス
 """
 
+import uuid
 from typing import List, Optional
-from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, insert, select, delete, func
 from ..models.db_models import TimelineItemHistory
 from ..utils.exceptions import DatabaseError
 
@@ -44,27 +44,102 @@ class HistoryService:
             DatabaseError: DB操作エラー
         """
         try:
+            # ID を先に採番し、コミット後の refresh（SELECT）を省略
+            history_id = str(uuid.uuid4())
             history = TimelineItemHistory(
+                id=history_id,
                 plan_id=plan_id,
                 day=day,
                 item_index=item_index,
                 operation_type=operation_type,
                 original_data=original_data,
                 updated_data=updated_data,
-                field_changed=field_changed,
-                created_at=datetime.now()
+                field_changed=field_changed
             )
             
             db.add(history)
             db.commit()
-            db.refresh(history)
             
-            return history.id
+            return history_id
             
         except Exception as e:
             db.rollback()
             raise DatabaseError(f"履歴記録エラー: {str(e)}")
     
+    @staticmethod
+    async def record_batch(
+        plan_id: str,
+        ops: List[dict],
+        db: Session = None
+    ) -> List[str]:
+        """
+        複数の編集操作をまとめて履歴に記録（executemany で一括INSERT）
+        
+        Args:
+            plan_id (str): プラン ID
+            ops (List[dict]): 編集操作リスト
+                各要素は record_edit と同じキー（day, item_index, operation_type,
+                original_data, updated_data, field_changed）を持つ辞書
+            db (Session): DBセッション
+            
+        Returns:
+            List[str]: 作成した履歴 ID リスト（ops と同じ順序）
+            
+        Raises:
+            DatabaseError: DB操作エラー
+        """
+        return await HistoryService.record_edits_bulk(
+            [{**op, "plan_id": plan_id} for op in ops],
+            db
+        )
+    
+    @staticmethod
+    async def record_edits_bulk(
+        edits: List[dict],
+        db: Session = None
+    ) -> List[str]:
+        """
+        複数プランにまたがる編集操作をまとめて履歴に記録（1文の executemany INSERT）
+        
+        Args:
+            edits (List[dict]): 編集操作リスト
+                各要素は record_edit と同じキー（plan_id, day, item_index,
+                operation_type, original_data, updated_data, field_changed）を持つ辞書
+            db (Session): DBセッション
+            
+        Returns:
+            List[str]: 作成した履歴 ID リスト（edits と同じ順序）
+            
+        Raises:
+            DatabaseError: DB操作エラー
+        """
+        if not edits:
+            return []
+        
+        try:
+            rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "plan_id": edit["plan_id"],
+                    "day": edit["day"],
+                    "item_index": edit["item_index"],
+                    "operation_type": edit["operation_type"],
+                    "original_data": edit.get("original_data"),
+                    "updated_data": edit.get("updated_data"),
+                    "field_changed": edit.get("field_changed"),
+                }
+                for edit in edits
+            ]
+            
+            db.execute(insert(TimelineItemHistory), rows)
+            db.commit()
+            
+            return [row["id"] for row in rows]
+            
+        except Exception as e:
+            db.rollback()
+            raise DatabaseError(f"履歴一括記録エラー: {str(e)}")
+    
     @staticmethod
     async def get_history(
         plan_id: str,
@@ -81,9 +156,11 @@ class HistoryService:
             List[dict]: 編集履歴リスト
         """
         try:
-            histories = db.query(TimelineItemHistory).filter(
-                TimelineItemHistory.plan_id == plan_id
-            ).order_by(desc(TimelineItemHistory.created_at)).all()
+            histories = db.execute(
+                select(TimelineItemHistory).where(
+                    TimelineItemHistory.plan_id == plan_id
+                ).order_by(desc(TimelineItemHistory.created_at))
+            ).scalars().all()
             
             return [h.to_dict() for h in histories]
             
@@ -108,10 +185,12 @@ class HistoryService:
             List[dict]: 編集履歴リスト
         """
         try:
-            histories = db.query(TimelineItemHistory).filter(
-                TimelineItemHistory.plan_id == plan_id,
-                TimelineItemHistory.day == day
-            ).order_by(desc(TimelineItemHistory.created_at)).all()
+            histories = db.execute(
+                select(TimelineItemHistory).where(
+                    TimelineItemHistory.plan_id == plan_id,
+                    TimelineItemHistory.day == day
+                ).order_by(desc(TimelineItemHistory.created_at))
+            ).scalars().all()
             
             return [h.to_dict() for h in histories]
             
@@ -131,9 +210,11 @@ class HistoryService:
             int: 編集回数
         """
         try:
-            return db.query(TimelineItemHistory).filter(
-                TimelineItemHistory.plan_id == plan_id
-            ).count()
+            return db.execute(
+                select(func.count()).select_from(TimelineItemHistory).where(
+                    TimelineItemHistory.plan_id == plan_id
+                )
+            ).scalar()
             
         except Exception as e:
             raise DatabaseError(f"履歴数カウントエラー: {str(e)}")
@@ -151,12 +232,14 @@ class HistoryService:
             int: 削除した履歴数
         """
         try:
-            result = db.query(TimelineItemHistory).filter(
-                TimelineItemHistory.plan_id == plan_id
-            ).delete()
+            result = db.execute(
+                delete(TimelineItemHistory).where(
+                    TimelineItemHistory.plan_id == plan_id
+                )
+            )
             
             db.commit()
-            return result
+            return result.rowcount
             
         except Exception as e:
             db.rollback()
@@ -180,11 +263,13 @@ class HistoryService:
             List[dict]: 編集履歴リスト
         """
         try:
-            histories = db.query(TimelineItemHistory).filter(
-                TimelineItemHistory.plan_id == plan_id
-            ).order_by(
-                desc(TimelineItemHistory.created_at)
-            ).limit(limit).all()
+            histories = db.execute(
+                select(TimelineItemHistory).where(
+                    TimelineItemHistory.plan_id == plan_id
+                ).order_by(
+                    desc(TimelineItemHistory.created_at)
+                ).limit(limit)
+            ).scalars().all()
             
             return [h.to_dict() for h in histories]
             
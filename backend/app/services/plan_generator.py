@@ -2,10 +2,17 @@
 AI旅行プラン生成サービス
 """
 
+import asyncio
+import hashlib
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional
-from ..models.travel_plan import TravelPlan, TravelInput, DaySchedule
+from functools import lru_cache
+from typing import List, Optional, Union
+import orjson
+from app.config import settings
+from ..models.travel_plan import TravelPlan, TravelInput, DAY_SCHEDULES_ADAPTER
 from .gemini_service import get_gemini_service
 from .prompts.travel_plan_prompt import parse_gemini_response, validate_plan_structure
 from ..utils.exceptions import GeminiAPIError, ValidationError
@@ -17,6 +24,11 @@ class PlanGeneratorService:
     def __init__(self):
         """初期化"""
         self.gemini_service = get_gemini_service()
+        
+        # 生成済みプランのキャッシュ（入力条件ハッシュ → (有効期限, 検証済みプランデータ)）
+        self._plan_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._plan_cache_size = settings.PLAN_CACHE_SIZE
+        self._plan_cache_ttl = settings.PLAN_CACHE_TTL
     
     async def generate_plan(self, travel_input: TravelInput) -> TravelPlan:
         """
@@ -36,17 +48,23 @@ class PlanGeneratorService:
         plan_id = str(uuid.uuid4())
         
         try:
-            # Gemini API を呼び出し
-            ai_response = await self.gemini_service.generate_travel_plan(
-                travel_input,
-                plan_id
-            )
-            
-            # レスポンスをパース
-            plan_data = parse_gemini_response(str(ai_response))
+            # 同じ入力条件で生成済みならキャッシュを使用（Gemini API 呼び出しを省略）
+            cache_key = self._cache_key(travel_input)
+            plan_data = self._get_cached_plan(cache_key)
+            is_cached = plan_data is not None
             
-            # 構造を検証
-            validate_plan_structure(plan_data)
+            if not is_cached:
+                # Gemini API を呼び出し
+                ai_response = await self.gemini_service.generate_travel_plan(
+                    travel_input,
+                    plan_id
+                )
+                
+                # レスポンスをパース
+                plan_data = parse_gemini_response(ai_response)
+                
+                # 構造を検証
+                validate_plan_structure(plan_data)
             
             # TravelPlan モデルに変換
             travel_plan = self._convert_to_travel_plan(
@@ -55,6 +73,10 @@ class PlanGeneratorService:
                 plan_data
             )
             
+            # 変換まで成功したデータのみキャッシュ（不正なレスポンスを使い回さない）
+            if not is_cached:
+                self._set_cached_plan(cache_key, plan_data)
+            
             return travel_plan
             
         except GeminiAPIError as e:
@@ -62,6 +84,66 @@ class PlanGeneratorService:
         except (ValueError, ValidationError) as e:
             raise ValidationError(f"データ検証エラー: {str(e)}")
     
+    async def generate_plans_batch(
+        self,
+        inputs: List[TravelInput],
+        concurrency: int = 8
+    ) -> List[Union[TravelPlan, Exception]]:
+        """
+        複数の旅行プランを並行生成
+        
+        全リクエストを先に投入してからまとめて待機する。
+        同時に実行する Gemini API 呼び出しは concurrency 件まで。
+        
+        Args:
+            inputs (List[TravelInput]): 旅行条件リスト
+            concurrency (int): 同時実行数の上限
+            
+        Returns:
+            List[Union[TravelPlan, Exception]]: inputs と同じ順序の結果
+                （失敗したものは GeminiAPIError / ValidationError の例外オブジェクト）
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _generate_one(travel_input: TravelInput) -> TravelPlan:
+            async with semaphore:
+                return await self.generate_plan(travel_input)
+        
+        return await asyncio.gather(
+            *(_generate_one(travel_input) for travel_input in inputs),
+            return_exceptions=True
+        )
+    
+    @staticmethod
+    def _cache_key(travel_input: TravelInput) -> str:
+        """入力条件からキャッシュキーを生成"""
+        payload = orjson.dumps(travel_input.model_dump(), option=orjson.OPT_SORT_KEYS)
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
+    def _get_cached_plan(self, key: str) -> Optional[dict]:
+        """キャッシュ済みプランデータを取得（期限切れ・未登録なら None）"""
+        entry = self._plan_cache.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, plan_data = entry
+        if expires_at < time.monotonic():
+            del self._plan_cache[key]
+            return None
+        
+        self._plan_cache.move_to_end(key)
+        return plan_data
+    
+    def _set_cached_plan(self, key: str, plan_data: dict) -> None:
+        """検証済みプランデータをキャッシュに登録（上限を超えたら古い順に削除）"""
+        if self._plan_cache_size <= 0:
+            return
+        
+        self._plan_cache[key] = (time.monotonic() + self._plan_cache_ttl, plan_data)
+        self._plan_cache.move_to_end(key)
+        while len(self._plan_cache) > self._plan_cache_size:
+            self._plan_cache.popitem(last=False)
+    
     def _convert_to_travel_plan(
         self,
         plan_id: str,
@@ -79,11 +161,10 @@ class PlanGeneratorService:
         Returns:
             TravelPlan: 変換済みプラン
         """
-        # DaySchedule オブジェクトを構築
-        schedules = []
-        for day_data in plan_data.get('schedules', []):
-            schedule = DaySchedule(**day_data)
-            schedules.append(schedule)
+        # DaySchedule オブジェクトを構築（配列全体を1回の検証で処理）
+        schedules = DAY_SCHEDULES_ADAPTER.validate_python(
+            plan_data.get('schedules', [])
+        )
         
         # 合計費用と時間を計算
         total_cost = plan_data.get('total_cost', 0)
@@ -91,7 +172,7 @@ class PlanGeneratorService:
         
         return TravelPlan(
             plan_id=plan_id,
-            input_data=travel_input.dict(),
+            input_data=travel_input.model_dump(),
             schedules=schedules,
             total_cost=total_cost,
             total_duration=total_duration,
@@ -99,17 +180,8 @@ class PlanGeneratorService:
         )
 
 
-# グローバルインスタンス
-_plan_generator = PlanGeneratorService()
-
-# エクスポート用インスタンス
-plan_generator = _plan_generator
-
-
+# グローバルインスタンス（初回呼び出し時に一度だけ生成）
+@lru_cache(maxsize=1)
 def get_plan_generator() -> PlanGeneratorService:
     """プランジェネレーター インスタンスを取得"""
-    global _plan_generator
-    if _plan_generator is None:
-        _plan_generator = PlanGeneratorService()
-    return _plan_generator
-
+    return PlanGeneratorService()
@@ -2,18 +2,42 @@
 プラン保存・取得サービス
 """
 
+import time
+import uuid
+import weakref
+import orjson
 from typing import List, Optional
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from ..models.db_models import TravelPlanDB, TimelineItemHistory
-from ..models.travel_plan import TravelPlan
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import desc, func, select, insert, delete, or_, and_, type_coerce, Text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from ..models.db_models import TravelPlanDB, TimelineItemHistory, TimelineItemHistoryArchive, _local_now
+from ..models.travel_plan import TravelPlan, DAY_SCHEDULES_ADAPTER
 from ..utils.exceptions import PlanNotFoundError, DatabaseError
 
+# 概算プラン数（count_plans(approximate=True)）のキャッシュ有効期間（秒）
+PLAN_COUNT_CACHE_TTL = 30
+
 
 class PlanStorageService:
     """プラン永続化管理"""
     
+    # 概算プラン数のキャッシュ（コネクションプール → (有効期限, 件数)）。保存・削除時に破棄する
+    # 同じDBを指すエンジン（読み取り専用エンジン含む）はプールを共有するため、プール単位で保持
+    _plan_count_cache: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+    
+    @staticmethod
+    def invalidate_count_cache(bind) -> None:
+        """
+        概算プラン数のキャッシュを破棄
+        
+        このサービスを経由せずにプランを追加・削除した場合に呼び出す
+        
+        Args:
+            bind: 対象DBの Engine / Connection
+        """
+        PlanStorageService._plan_count_cache.pop(bind.engine.pool, None)
+    
     @staticmethod
     async def save_plan(plan: TravelPlan, db: Session) -> str:
         """
@@ -30,20 +54,90 @@ class PlanStorageService:
             DatabaseError: DB操作エラー
         """
         try:
-            db_plan = TravelPlanDB(
-                plan_id=plan.plan_id,
-                input_data=plan.input_data,
-                schedules=[s.dict() for s in plan.schedules],
-                total_cost=plan.total_cost,
-                total_duration=plan.total_duration,
-                created_at=plan.created_at or datetime.now()
-            )
+            values = {
+                "plan_id": plan.plan_id,
+                "input_data": plan.input_data,
+                "schedules": DAY_SCHEDULES_ADAPTER.dump_python(plan.schedules),
+                "total_cost": plan.total_cost,
+                "total_duration": plan.total_duration,
+            }
+            if plan.created_at is not None:
+                values["created_at"] = plan.created_at
             
-            db.add(db_plan)
+            # INSERT ... RETURNING で1往復（ORM の flush / refresh を省略）
+            row = db.execute(
+                insert(TravelPlanDB).values(**values).returning(
+                    TravelPlanDB.plan_id,
+                    TravelPlanDB.created_at
+                )
+            ).one()
             db.commit()
-            db.refresh(db_plan)
+            PlanStorageService.invalidate_count_cache(db.get_bind())
             
-            return db_plan.plan_id
+            # DB側で生成された作成日時を反映
+            plan.created_at = row.created_at
+            
+            return row.plan_id
+            
+        except Exception as e:
+            db.rollback()
+            raise DatabaseError(f"プラン保存エラー: {str(e)}")
+    
+    @staticmethod
+    async def upsert_plan(plan: TravelPlan, db: Session) -> bool:
+        """
+        プランを保存（存在しなければ新規作成、存在すれば更新）
+        
+        INSERT ... ON CONFLICT(plan_id) DO UPDATE を1文で発行するため、
+        事前の存在確認クエリは不要
+        
+        Args:
+            plan (TravelPlan): 保存するプラン
+            db (Session): DBセッション
+            
+        Returns:
+            bool: 新規作成時 True / 更新時 False
+            
+        Raises:
+            DatabaseError: DB操作エラー
+        """
+        try:
+            new_id = str(uuid.uuid4())
+            
+            values = {
+                "id": new_id,
+                "plan_id": plan.plan_id,
+                "input_data": plan.input_data,
+                "schedules": DAY_SCHEDULES_ADAPTER.dump_python(plan.schedules),
+                "total_cost": plan.total_cost,
+                "total_duration": plan.total_duration,
+                # 作成・更新日時はDB側で生成（created_at 未指定時はカラムのデフォルトを使用）
+                "updated_at": _local_now(),
+            }
+            if plan.created_at is not None:
+                values["created_at"] = plan.created_at
+            
+            stmt = sqlite_insert(TravelPlanDB).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["plan_id"],
+                set_={
+                    "input_data": stmt.excluded.input_data,
+                    "schedules": stmt.excluded.schedules,
+                    "total_cost": stmt.excluded.total_cost,
+                    "total_duration": stmt.excluded.total_duration,
+                    "updated_at": _local_now(),
+                }
+            ).returning(TravelPlanDB.id)
+            
+            # 既存行を更新した場合は元の id が返る
+            saved_id = db.execute(stmt).scalar_one()
+            db.commit()
+            
+            created = saved_id == new_id
+            if created:
+                PlanStorageService.invalidate_count_cache(db.get_bind())
+            
+            return created
             
         except Exception as e:
             db.rollback()
@@ -65,9 +159,9 @@ class PlanStorageService:
             PlanNotFoundError: プラン未検出時
         """
         try:
-            db_plan = db.query(TravelPlanDB).filter(
-                TravelPlanDB.plan_id == plan_id
-            ).first()
+            db_plan = db.execute(
+                select(TravelPlanDB).where(TravelPlanDB.plan_id == plan_id)
+            ).scalar_one_or_none()
             
             if not db_plan:
                 raise PlanNotFoundError(f"プラン未検出: {plan_id}")
@@ -87,28 +181,137 @@ class PlanStorageService:
         except Exception as e:
             raise DatabaseError(f"プラン取得エラー: {str(e)}")
     
+    @staticmethod
+    async def get_plan_raw(plan_id: str, db: Session) -> dict:
+        """
+        プランをDBから辞書形式で取得（Pydanticモデルを経由しない）
+        
+        Args:
+            plan_id (str): プラン ID
+            db (Session): DBセッション
+            
+        Returns:
+            dict: 取得したプラン（TravelPlanDB.to_dict() 形式）
+            
+        Raises:
+            PlanNotFoundError: プラン未検出時
+        """
+        try:
+            db_plan = db.execute(
+                select(TravelPlanDB).where(TravelPlanDB.plan_id == plan_id)
+            ).scalar_one_or_none()
+            
+            if not db_plan:
+                raise PlanNotFoundError(f"プラン未検出: {plan_id}")
+            
+            return db_plan.to_dict()
+            
+        except PlanNotFoundError:
+            raise
+        except Exception as e:
+            raise DatabaseError(f"プラン取得エラー: {str(e)}")
+    
     @staticmethod
     async def get_all_plans(
         db: Session,
         limit: int = 10,
-        offset: int = 0
+        offset: int = 0,
+        before: Optional[datetime] = None,
+        before_id: Optional[str] = None,
+        raw_json: bool = False,
+        include_schedules: bool = True
     ) -> List[dict]:
         """
         保存済みプラン一覧を取得（最新順）
         
+        before を指定した場合はキーセットページング（created_at, plan_id）で
+        取得し、offset は無視する
+        
+        raw_json=True の場合、input_data / schedules はDBに保存されたJSON文字列を
+        orjson.Fragment で包んで返す（デコード・再エンコードを省略。
+        ORJSONResponse でそのまま出力する一覧API向け）
+        
+        include_schedules=False の場合は schedules カラムを読み込まない
+        （一覧画面では使わないため。TravelPlanDB.to_summary_dict() 形式）
+        
         Args:
             db (Session): DBセッション
             limit (int): 取得件数
-            offset (int): オフセット
+            offset (int): オフセット（before 未指定時のみ使用）
+            before (datetime): この作成日時より古いプランを取得
+            before_id (str): before と同時刻のプランの境界となる plan_id
+            raw_json (bool): JSONカラムを orjson.Fragment のまま返すか
+            include_schedules (bool): schedules を含めるか
             
         Returns:
             List[dict]: プラン一覧
         """
         try:
-            db_plans = db.query(TravelPlanDB).order_by(
-                desc(TravelPlanDB.created_at)
-            ).limit(limit).offset(offset).all()
+            if raw_json:
+                columns = [
+                    TravelPlanDB.plan_id,
+                    type_coerce(TravelPlanDB.input_data, Text).label("input_data"),
+                    TravelPlanDB.total_cost,
+                    TravelPlanDB.total_duration,
+                    TravelPlanDB.created_at,
+                    TravelPlanDB.updated_at
+                ]
+                if include_schedules:
+                    columns.append(
+                        type_coerce(TravelPlanDB.schedules, Text).label("schedules")
+                    )
+                stmt = select(*columns)
+            else:
+                stmt = select(TravelPlanDB)
+                if not include_schedules:
+                    stmt = stmt.options(load_only(
+                        TravelPlanDB.plan_id,
+                        TravelPlanDB.input_data,
+                        TravelPlanDB.total_cost,
+                        TravelPlanDB.total_duration,
+                        TravelPlanDB.created_at,
+                        TravelPlanDB.updated_at
+                    ))
+            
+            if before is not None:
+                if before_id is not None:
+                    stmt = stmt.where(or_(
+                        TravelPlanDB.created_at < before,
+                        and_(
+                            TravelPlanDB.created_at == before,
+                            TravelPlanDB.plan_id < before_id
+                        )
+                    ))
+                else:
+                    stmt = stmt.where(TravelPlanDB.created_at < before)
+            
+            stmt = stmt.order_by(
+                desc(TravelPlanDB.created_at),
+                desc(TravelPlanDB.plan_id)
+            ).limit(limit)
             
+            if before is None and offset:
+                stmt = stmt.offset(offset)
+            
+            if raw_json:
+                plans = []
+                for row in db.execute(stmt):
+                    plan = {
+                        "plan_id": row.plan_id,
+                        "input_data": orjson.Fragment(row.input_data),
+                        "total_cost": row.total_cost,
+                        "total_duration": row.total_duration,
+                        "created_at": row.created_at.isoformat() if row.created_at else None,
+                        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+                    }
+                    if include_schedules:
+                        plan["schedules"] = orjson.Fragment(row.schedules)
+                    plans.append(plan)
+                return plans
+            
+            db_plans = db.execute(stmt).scalars().all()
+            if not include_schedules:
+                return [plan.to_summary_dict() for plan in db_plans]
             return [plan.to_dict() for plan in db_plans]
             
         except Exception as e:
@@ -136,18 +339,17 @@ class PlanStorageService:
             DatabaseError: DB操作エラー
         """
         try:
-            db_plan = db.query(TravelPlanDB).filter(
-                TravelPlanDB.plan_id == plan_id
-            ).first()
+            db_plan = db.execute(
+                select(TravelPlanDB).where(TravelPlanDB.plan_id == plan_id)
+            ).scalar_one_or_none()
             
             if not db_plan:
                 raise PlanNotFoundError(f"プラン未検出: {plan_id}")
             
             # 更新実行
-            db_plan.schedules = [s.dict() for s in updated_plan.schedules]
+            db_plan.schedules = DAY_SCHEDULES_ADAPTER.dump_python(updated_plan.schedules)
             db_plan.total_cost = updated_plan.total_cost
             db_plan.total_duration = updated_plan.total_duration
-            db_plan.updated_at = datetime.now()
             
             db.commit()
             return True
@@ -175,18 +377,26 @@ class PlanStorageService:
         """
         try:
             # 編集履歴を削除
-            db.query(TimelineItemHistory).filter(
-                TimelineItemHistory.plan_id == plan_id
-            ).delete()
+            db.execute(
+                delete(TimelineItemHistory).where(
+                    TimelineItemHistory.plan_id == plan_id
+                )
+            )
+            db.execute(
+                delete(TimelineItemHistoryArchive).where(
+                    TimelineItemHistoryArchive.plan_id == plan_id
+                )
+            )
             
             # プランを削除
-            result = db.query(TravelPlanDB).filter(
-                TravelPlanDB.plan_id == plan_id
-            ).delete()
+            result = db.execute(
+                delete(TravelPlanDB).where(TravelPlanDB.plan_id == plan_id)
+            )
             
             db.commit()
+            PlanStorageService.invalidate_count_cache(db.get_bind())
             
-            if result == 0:
+            if result.rowcount == 0:
                 raise PlanNotFoundError(f"プラン未検出: {plan_id}")
             
             return True
@@ -198,20 +408,40 @@ class PlanStorageService:
             raise DatabaseError(f"プラン削除エラー: {str(e)}")
     
     @staticmethod
-    async def count_plans(db: Session) -> int:
+    async def count_plans(db: Session, approximate: bool = False) -> int:
         """
         保存済みプラン数を取得
         
+        approximate=True の場合は直近の集計結果を最大 PLAN_COUNT_CACHE_TTL 秒
+        再利用する（一覧画面の総件数表示など、多少の誤差を許容する用途向け）。
+        このサービス経由の保存・削除と cleanup_old_plans ではキャッシュを破棄する
+        
         Args:
             db (Session): DBセッション
+            approximate (bool): キャッシュ済みの件数を許容するか
             
         Returns:
             int: プラン数
         """
+        pool = db.get_bind().engine.pool
+        if approximate:
+            cached = PlanStorageService._plan_count_cache.get(pool)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+        
         try:
-            return db.query(TravelPlanDB).count()
+            count = db.execute(
+                select(func.count()).select_from(TravelPlanDB)
+            ).scalar()
         except Exception as e:
             raise DatabaseError(f"プラン数取得エラー: {str(e)}")
+        
+        if approximate:
+            PlanStorageService._plan_count_cache[pool] = (
+                time.monotonic() + PLAN_COUNT_CACHE_TTL,
+                count
+            )
+        return count
 
 
 # グローバルインスタンス
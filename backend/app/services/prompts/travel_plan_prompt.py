@@ -2,40 +2,25 @@
 旅行プラン生成用プロンプト
 """
 
-from typing import List
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
 import json
-from datetime import datetime
+import orjson
+from datetime import date
 from ...models.travel_plan import TravelInput
 
 
-def create_travel_prompt(travel_input: TravelInput) -> str:
-    """
-    旅行プラン生成用プロンプト作成
-    
-    Args:
-        travel_input (TravelInput): 旅行条件
-        
-    Returns:
-        str: Gemini API用プロンプト
-    """
-    interests_str = ', '.join(travel_input.interests) if travel_input.interests else "特に指定なし"
-    additional_notes = travel_input.additional_notes or "特になし"
-    
-    # 日数を計算
-    start = datetime.strptime(travel_input.start_date, "%Y-%m-%d")
-    end = datetime.strptime(travel_input.end_date, "%Y-%m-%d")
-    num_days = (end - start).days + 1
-    
-    prompt = f"""あなたは旅行プランナーです。以下の条件で{num_days}日間の旅行プランをJSON形式で生成してください。
+# プロンプトテンプレート（モジュール読み込み時に一度だけ構築し、format_map で埋め込む）
+_PROMPT_TEMPLATE = """あなたは旅行プランナーです。以下の条件で{num_days}日間の旅行プランをJSON形式で生成してください。
 
 ## 旅行条件
-出発地: {travel_input.origin}
-目的地: {travel_input.destination}
-開始日: {travel_input.start_date}
-終了日: {travel_input.end_date}
+出発地: {origin}
+目的地: {destination}
+開始日: {start_date}
+終了日: {end_date}
 日数: {num_days}日間
-予算: ¥{travel_input.budget:,}
-興味: {interests_str}
+予算: ¥{budget_fmt}
+興味: {interests}
 追加要望: {additional_notes}
 
 ## 必須要件
@@ -52,7 +37,7 @@ def create_travel_prompt(travel_input: TravelInput) -> str:
   "schedules": [
     {{
       "day": 1,
-      "date": "{travel_input.start_date}",
+      "date": "{start_date}",
       "timeline": [
         {{
           "time": "08:00",
@@ -65,7 +50,7 @@ def create_travel_prompt(travel_input: TravelInput) -> str:
         {{
           "time": "09:30",
           "activity": "観光スポット",
-          "location": "{travel_input.destination}の名所",
+          "location": "{destination}の名所",
           "cost": 1000,
           "duration": 120,
           "notes": "朝一番がおすすめ"
@@ -75,21 +60,78 @@ def create_travel_prompt(travel_input: TravelInput) -> str:
       "daily_duration": 600
     }}
   ],
-  "total_cost": {travel_input.budget},
-  "total_duration": {num_days * 600}
+  "total_cost": {budget},
+  "total_duration": {total_duration}
 }}
 
 重要: JSONのみを返し、```json```のマーカーも含めないでください。"""
+
+
+def create_travel_prompt(travel_input: TravelInput) -> str:
+    """
+    旅行プラン生成用プロンプト作成
+    
+    同じ旅行条件のプロンプトは _build_prompt のキャッシュから返す
+    
+    Args:
+        travel_input (TravelInput): 旅行条件
+        
+    Returns:
+        str: Gemini API用プロンプト
+    """
+    return _build_prompt(
+        travel_input.origin,
+        travel_input.destination,
+        travel_input.start_date,
+        travel_input.end_date,
+        travel_input.budget,
+        tuple(travel_input.interests),
+        travel_input.additional_notes
+    )
+
+
+@lru_cache(maxsize=512)
+def _build_prompt(
+    origin: str,
+    destination: str,
+    start_date: str,
+    end_date: str,
+    budget: int,
+    interests: Tuple[str, ...],
+    additional_notes: Optional[str]
+) -> str:
+    """旅行条件からプロンプトを構築（引数はキャッシュキーのためハッシュ可能な値のみ）"""
+    interests_str = ', '.join(interests) if interests else "特に指定なし"
+    additional_notes = additional_notes or "特になし"
+    
+    # 日数を計算
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    num_days = (end - start).days + 1
+    
+    prompt = _PROMPT_TEMPLATE.format_map({
+        "num_days": num_days,
+        "origin": origin,
+        "destination": destination,
+        "start_date": start_date,
+        "end_date": end_date,
+        "budget": budget,
+        "budget_fmt": f"{budget:,}",
+        "interests": interests_str,
+        "additional_notes": additional_notes,
+        "total_duration": num_days * 600,
+    })
     
     return prompt.strip()
 
 
-def parse_gemini_response(response_text: str) -> dict:
+def parse_gemini_response(response_text: Union[str, dict]) -> dict:
     """
     Gemini APIレスポンスをパース
     
     Args:
-        response_text (str): Gemini APIのレスポンステキスト
+        response_text (Union[str, dict]): Gemini APIのレスポンステキスト
+            （パース済みの dict が渡された場合はそのまま返す）
         
     Returns:
         dict: パース済みJSON
@@ -97,28 +139,38 @@ def parse_gemini_response(response_text: str) -> dict:
     Raises:
         ValueError: JSON パース失敗時
     """
+    if isinstance(response_text, dict):
+        return response_text
+    
     try:
         # マークダウンのコードブロックを除去
         cleaned_text = response_text.strip()
         
-        # ```json で囲まれている場合
-        if "```json" in cleaned_text:
-            json_str = cleaned_text.split("```json")[1].split("```")[0].strip()
+        # ```json で囲まれている場合（split で全体を分割せず、位置を探して1回だけスライス）
+        fence_idx = cleaned_text.find("```json")
+        if fence_idx != -1:
+            start_idx = fence_idx + len("```json")
+            end_idx = cleaned_text.find("```", start_idx)
+            if end_idx == -1:
+                end_idx = len(cleaned_text)
+            json_str = cleaned_text[start_idx:end_idx].strip()
         # ``` のみで囲まれている場合
         elif cleaned_text.startswith("```") and cleaned_text.endswith("```"):
             json_str = cleaned_text[3:-3].strip()
             if json_str.startswith("json"):
                 json_str = json_str[4:].strip()
         # 余分なテキストがある場合、最初の { から最後の } まで抽出
-        elif "{" in cleaned_text and "}" in cleaned_text:
-            start_idx = cleaned_text.find("{")
-            end_idx = cleaned_text.rfind("}") + 1
-            json_str = cleaned_text[start_idx:end_idx]
+        # （存在確認と位置検索を兼ね、前方・後方から1回ずつだけ走査）
         else:
-            json_str = cleaned_text
+            start_idx = cleaned_text.find("{")
+            end_idx = cleaned_text.rfind("}")
+            if start_idx != -1 and end_idx != -1:
+                json_str = cleaned_text[start_idx:end_idx + 1]
+            else:
+                json_str = cleaned_text
         
-        # JSONをパース
-        parsed = json.loads(json_str)
+        # JSONをパース（orjson.JSONDecodeError は json.JSONDecodeError のサブクラス）
+        parsed = orjson.loads(json_str)
         return parsed
         
     except json.JSONDecodeError as e:
@@ -142,18 +194,22 @@ def validate_plan_structure(plan_dict: dict) -> bool:
     Raises:
         ValueError: 構造が不正な場合
     """
-    required_keys = {"schedules"}
-    if not required_keys.issubset(plan_dict.keys()):
-        raise ValueError(f"必須キーが不足: {required_keys - set(plan_dict.keys())}")
+    # 必須キーは schedules のみのため、集合演算を使わず直接確認
+    schedules = plan_dict.get("schedules")
+    if schedules is None and "schedules" not in plan_dict:
+        raise ValueError("必須キーが不足: {'schedules'}")
     
-    if not isinstance(plan_dict["schedules"], list):
+    if not isinstance(schedules, list):
         raise ValueError("schedules は配列である必要があります")
     
-    if len(plan_dict["schedules"]) == 0:
+    if not schedules:
         raise ValueError("schedules が空です")
     
     # 各スケジュールの基本構造を検証
-    for i, schedule in enumerate(plan_dict["schedules"]):
+    # （フィールドの型は _convert_to_travel_plan の TypeAdapter が一括で検証する）
+    for i, schedule in enumerate(schedules):
+        if not isinstance(schedule, dict):
+            raise ValueError(f"スケジュール{i+1}がオブジェクトではありません")
         if "day" not in schedule:
             raise ValueError(f"スケジュール{i+1}に'day'キーがありません")
         if "date" not in schedule:
@@ -4,8 +4,11 @@ APIキー不要の無料天気API
 """
 
 import asyncio
+import time
+from collections import OrderedDict
+from functools import lru_cache
 import aiohttp
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 import logging
 
@@ -15,6 +18,47 @@ logger = logging.getLogger(__name__)
 OPEN_METEO_BASE_URL = "https://api.open-meteo.com/v1/forecast"
 OPEN_METEO_GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
 
+# 取得結果のキャッシュ設定（件数上限, 有効期間（秒））
+# 地名の座標はほぼ変わらないため長め、予報は更新間隔（約30分）に合わせる
+GEOCODING_CACHE_SIZE = 2048
+GEOCODING_CACHE_TTL = 86400
+WEATHER_CACHE_SIZE = 4096
+WEATHER_CACHE_TTL = 1800
+
+# WMO天気コード → 日本語説明（インポート時に一度だけ構築）
+WEATHER_DESCRIPTIONS: Dict[int, str] = {
+    0: "晴天",
+    1: "ほぼ晴天",
+    2: "部分的に曇り",
+    3: "曇り",
+    45: "霧",
+    48: "霧（続く）",
+    51: "小雨",
+    53: "中程度の雨",
+    55: "激しい雨",
+    61: "弱い雨",
+    63: "中程度の雨",
+    65: "激しい雨",
+    71: "弱い雪",
+    73: "中程度の雪",
+    75: "激しい雪",
+    77: "みぞれ",
+    80: "弱い通り雨",
+    81: "中程度の通り雨",
+    82: "激しい通り雨",
+    85: "弱い雪",
+    86: "激しい雪",
+    95: "雷雨",
+    96: "雹を伴う雷雨",
+    99: "雹を伴う雷雨"
+}
+
+# Open-Meteo への同時リクエスト数の上限
+MAX_CONCURRENT_REQUESTS = 10
+
+# キャッシュ未登録を表す値（ジオコーディング結果の None もキャッシュするため）
+_MISSING = object()
+
 
 class WeatherService:
     """Open-Meteo APIを使用した天気情報取得"""
@@ -24,27 +68,69 @@ class WeatherService:
         self.base_url = OPEN_METEO_BASE_URL
         self.geocoding_url = OPEN_METEO_GEOCODING_URL
         self.timeout = aiohttp.ClientTimeout(total=10)
+        
+        # 全リクエストで共有するセッション（初回使用時に生成、接続プール・keep-alive を再利用）
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # 同時リクエスト数の制限（一括取得時にレート制限・接続拒否を避ける）
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        
+        # 取得結果のキャッシュ（キー → (有効期限, 結果, 条件付きリクエスト用ヘッダー)）
+        self._geocoding_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._weather_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """共有 ClientSession を取得（未生成・クローズ済みなら生成）"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300)
+            )
+        return self._session
+    
+    async def aclose(self) -> None:
+        """共有 ClientSession をクローズ（アプリ終了時に呼び出す）"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def get_weather(
         self,
         latitude: float,
         longitude: float,
-        days: int = 7
+        days: int = 7,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         指定座標の天気情報を取得
         
+        start_date / end_date を指定した場合は旅行期間分だけを1回のリクエストで取得する
+        （days は無視）。未指定時は今日から days 日分を取得する
+        
         Args:
             latitude: 緯度
             longitude: 経度
             days: 取得する日数（最大16日間）
+            start_date: 取得開始日（YYYY-MM-DD形式）
+            end_date: 取得終了日（YYYY-MM-DD形式）
         
         Returns:
-            天気情報辞書
+            天気情報辞書（キャッシュとは別の辞書。forecast 内の要素は共有のため変更しないこと）
         
         Raises:
             Exception: API呼び出しエラー
         """
+        use_range = start_date is not None and end_date is not None
+        
+        # 近接する座標は同じ予報として扱う（小数点以下3桁 ≒ 100m）
+        period = (start_date, end_date) if use_range else days
+        cache_key = (round(latitude, 3), round(longitude, 3), period)
+        cached = self._cache_get(self._weather_cache, cache_key)
+        if cached is not _MISSING:
+            return self._copy(cached)
+        stale = self._cache_stale(self._weather_cache, cache_key)
+        
         try:
             params = {
                 "latitude": latitude,
@@ -55,12 +141,36 @@ class WeatherService:
                 "precipitation_unit": "mm",
                 "timezone": "auto"
             }
+            # 必要な期間だけをAPI側で絞り込む（取得後のスライスは不要）
+            if use_range:
+                params["start_date"] = start_date
+                params["end_date"] = end_date
+            else:
+                params["forecast_days"] = days
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(self.base_url, params=params) as response:
-                    if response.status == 200:
+            session = await self._get_session()
+            async with self._semaphore:
+                async with session.get(
+                    self.base_url,
+                    params=params,
+                    headers=stale[1] if stale else None
+                ) as response:
+                    if response.status == 304 and stale is not None:
+                        # 未更新: 期限切れのキャッシュをそのまま再利用
+                        weather = stale[0]
+                    elif response.status == 200:
                         data = await response.json()
-                        return self._parse_weather_response(data, days)
+                        weather = self._parse_weather_response(data)
+                    else:
+                        weather = _MISSING
+                    
+                    if weather is not _MISSING:
+                        self._cache_set(
+                            self._weather_cache, cache_key, weather,
+                            WEATHER_CACHE_SIZE, WEATHER_CACHE_TTL,
+                            self._validators(response, stale)
+                        )
+                        return self._copy(weather)
                     else:
                         logger.error(f"天気API エラー: {response.status}")
                         raise Exception(f"Weather API Error: {response.status}")
@@ -85,6 +195,12 @@ class WeatherService:
         Raises:
             Exception: API呼び出しエラー
         """
+        cache_key = location_name.strip().lower()
+        cached = self._cache_get(self._geocoding_cache, cache_key)
+        if cached is not _MISSING:
+            return self._copy(cached)
+        stale = self._cache_stale(self._geocoding_cache, cache_key)
+        
         try:
             params = {
                 "name": location_name,
@@ -93,19 +209,37 @@ class WeatherService:
                 "format": "json"
             }
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(self.geocoding_url, params=params) as response:
-                    if response.status == 200:
+            session = await self._get_session()
+            async with self._semaphore:
+                async with session.get(
+                    self.geocoding_url,
+                    params=params,
+                    headers=stale[1] if stale else None
+                ) as response:
+                    if response.status == 304 and stale is not None:
+                        # 未更新: 期限切れのキャッシュをそのまま再利用
+                        coordinates = stale[0]
+                    elif response.status == 200:
                         data = await response.json()
+                        coordinates = None
                         if data.get("results") and len(data["results"]) > 0:
                             result = data["results"][0]
-                            return {
+                            coordinates = {
                                 "latitude": result["latitude"],
                                 "longitude": result["longitude"],
                                 "name": result.get("name", ""),
                                 "country": result.get("country", "")
                             }
-                        return None
+                    else:
+                        coordinates = _MISSING
+                    
+                    if coordinates is not _MISSING:
+                        self._cache_set(
+                            self._geocoding_cache, cache_key, coordinates,
+                            GEOCODING_CACHE_SIZE, GEOCODING_CACHE_TTL,
+                            self._validators(response, stale)
+                        )
+                        return self._copy(coordinates)
                     else:
                         logger.error(f"ジオコーディングAPI エラー: {response.status}")
                         raise Exception(f"Geocoding API Error: {response.status}")
@@ -117,34 +251,115 @@ class WeatherService:
             logger.error(f"位置情報取得エラー: {str(e)}")
             raise
     
-    def _parse_weather_response(self, data: Dict[str, Any], days: int) -> Dict[str, Any]:
+    @staticmethod
+    def _cache_get(cache: OrderedDict, key) -> Any:
+        """キャッシュ済みの結果を取得（期限切れ・未登録なら _MISSING）"""
+        entry = cache.get(key)
+        if entry is None:
+            return _MISSING
+        
+        expires_at, value, validators = entry
+        if expires_at < time.monotonic():
+            # 再検証用ヘッダーがあれば条件付きリクエストのために残す
+            if not validators:
+                del cache[key]
+            return _MISSING
+        
+        cache.move_to_end(key)
+        return value
+    
+    @staticmethod
+    def _copy(value: Any) -> Any:
+        """
+        キャッシュ済みの結果を呼び出し側に返すための浅いコピー
+        
+        呼び出し側での変更（プランへの追加など）がキャッシュに反映されないようにする
+        """
+        return dict(value) if isinstance(value, dict) else value
+    
+    @staticmethod
+    def _cache_stale(cache: OrderedDict, key) -> Optional[Tuple[Any, Dict[str, str]]]:
+        """
+        期限切れだが再検証可能なキャッシュを取得
+        
+        Returns:
+            (結果, 条件付きリクエスト用ヘッダー) または None
+        """
+        entry = cache.get(key)
+        if entry is None or not entry[2]:
+            return None
+        return entry[1], entry[2]
+    
+    @staticmethod
+    def _cache_set(
+        cache: OrderedDict,
+        key,
+        value: Any,
+        max_size: int,
+        ttl: int,
+        validators: Optional[Dict[str, str]] = None
+    ) -> None:
+        """結果をキャッシュに登録（上限を超えたら古い順に削除）"""
+        cache[key] = (time.monotonic() + ttl, value, validators or {})
+        cache.move_to_end(key)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+    
+    @staticmethod
+    def _validators(
+        response: aiohttp.ClientResponse,
+        stale: Optional[Tuple[Any, Dict[str, str]]]
+    ) -> Dict[str, str]:
+        """
+        レスポンスの ETag / Last-Modified から次回の条件付きリクエスト用ヘッダーを作成
+        
+        304 応答でヘッダーが省略された場合は前回の値を引き継ぐ
+        """
+        validators = {}
+        etag = response.headers.get("ETag")
+        if etag:
+            validators["If-None-Match"] = etag
+        last_modified = response.headers.get("Last-Modified")
+        if last_modified:
+            validators["If-Modified-Since"] = last_modified
+        
+        if not validators and response.status == 304 and stale is not None:
+            return stale[1]
+        return validators
+    
+    def _parse_weather_response(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Open-Meteo APIレスポンスをパース
         
         Args:
-            data: APIレスポンス
-            days: 取得する日数
+            data: APIレスポンス（取得期間はリクエスト時に指定済み）
         
         Returns:
             パース済み天気情報
         """
         daily = data.get("daily", {})
-        times = daily.get("time", [])[:days]
-        weather_codes = daily.get("weather_code", [])[:days]
-        temps_max = daily.get("temperature_2m_max", [])[:days]
-        temps_min = daily.get("temperature_2m_min", [])[:days]
-        precipitations = daily.get("precipitation_sum", [])[:days]
-        
-        forecasts = []
-        for i, date_str in enumerate(times):
-            forecasts.append({
+        times = daily.get("time", [])
+        
+        # 日付の件数に揃える（通常は同じ長さ。不足分は欠損値で補う）
+        n = len(times)
+        weather_codes = self._fit(daily.get("weather_code", []), n, _MISSING)
+        temps_max = self._fit(daily.get("temperature_2m_max", []), n, None)
+        temps_min = self._fit(daily.get("temperature_2m_min", []), n, None)
+        precipitations = self._fit(daily.get("precipitation_sum", []), n, 0)
+        
+        describe = self._get_weather_description
+        forecasts = [
+            {
                 "date": date_str,
-                "weather_code": weather_codes[i] if i < len(weather_codes) else None,
-                "weather_description": self._get_weather_description(weather_codes[i]) if i < len(weather_codes) else "不明",
-                "temp_max": temps_max[i] if i < len(temps_max) else None,
-                "temp_min": temps_min[i] if i < len(temps_min) else None,
-                "precipitation": precipitations[i] if i < len(precipitations) else 0
-            })
+                "weather_code": None if code is _MISSING else code,
+                "weather_description": "不明" if code is _MISSING else describe(code),
+                "temp_max": temp_max,
+                "temp_min": temp_min,
+                "precipitation": precipitation
+            }
+            for date_str, code, temp_max, temp_min, precipitation
+            in zip(times, weather_codes, temps_max, temps_min, precipitations)
+        ]
         
         return {
             "location": {
@@ -155,6 +370,13 @@ class WeatherService:
             "forecast": forecasts
         }
     
+    @staticmethod
+    def _fit(values: List[Any], n: int, fill: Any) -> List[Any]:
+        """リストを n 件に揃える（長さが一致していればそのまま返す）"""
+        if len(values) == n:
+            return values
+        return (values + [fill] * n)[:n]
+    
     @staticmethod
     def _get_weather_description(weather_code: int) -> str:
         """
@@ -166,39 +388,14 @@ class WeatherService:
         Returns:
             日本語の天気説明
         """
-        weather_descriptions = {
-            0: "晴天",
-            1: "ほぼ晴天",
-            2: "部分的に曇り",
-            3: "曇り",
-            45: "霧",
-            48: "霧（続く）",
-            51: "小雨",
-            53: "中程度の雨",
-            55: "激しい雨",
-            61: "弱い雨",
-            63: "中程度の雨",
-            65: "激しい雨",
-            71: "弱い雪",
-            73: "中程度の雪",
-            75: "激しい雪",
-            77: "みぞれ",
-            80: "弱い通り雨",
-            81: "中程度の通り雨",
-            82: "激しい通り雨",
-            85: "弱い雪",
-            86: "激しい雪",
-            95: "雷雨",
-            96: "雹を伴う雷雨",
-            99: "雹を伴う雷雨"
-        }
-        return weather_descriptions.get(weather_code, f"コード{weather_code}")
-
-
-# グローバルインスタンス
-_weather_service: Optional[WeatherService] = None
+        description = WEATHER_DESCRIPTIONS.get(weather_code)
+        if description is None:
+            return f"コード{weather_code}"
+        return description
 
 
+# グローバルインスタンス（初回呼び出し時に一度だけ生成）
+@lru_cache(maxsize=1)
 def get_weather_service() -> WeatherService:
     """
     天気サービスインスタンスを取得（シングルトン）
@@ -206,7 +403,4 @@ def get_weather_service() -> WeatherService:
     Returns:
         WeatherService インスタンス
     """
-    global _weather_service
-    if _weather_service is None:
-        _weather_service = WeatherService()
-    return _weather_service
+    return WeatherService()
@@ -1,13 +1,23 @@
 """
 ユーティリティ関数
 """
-from .exceptions import PlanNotFoundError, DatabaseError, ValidationError
+from .exceptions import (
+    ApplicationException,
+    PlanNotFoundError,
+    DatabaseError,
+    ValidationError,
+    GeminiAPIError,
+    PlanGenerationError,
+)
 from .validators import validate_travel_input, validate_plan_id
 
 __all__ = [
+    "ApplicationException",
     "PlanNotFoundError",
     "DatabaseError",
     "ValidationError",
+    "GeminiAPIError",
+    "PlanGenerationError",
     "validate_travel_input",
     "validate_plan_id",
-]
\ No newline at end of file
+]
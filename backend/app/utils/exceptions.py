@@ -3,23 +3,23 @@
 """
 
 
-class PlanNotFoundError(Exception):
-    """プランが見つからない場合の例外"""
+class ApplicationException(Exception):
+    """アプリケーション例外の基底クラス"""
     pass
 
 
-class DatabaseError(Exception):
-    """データベース操作エラーの例外"""
+class PlanNotFoundError(ApplicationException):
+    """プランが見つからない場合の例外"""
     pass
 
 
-class ValidationError(Exception):
-    """バリデーションエラーの例外"""
+class DatabaseError(ApplicationException):
+    """データベース操作エラーの例外"""
     pass
 
 
-class ApplicationException(Exception):
-    """アプリケーション例外の基底クラス"""
+class ValidationError(ApplicationException):
+    """データ検証エラー"""
     pass
 
 
@@ -28,11 +28,6 @@ class GeminiAPIError(ApplicationException):
     pass
 
 
-class ValidationError(ApplicationException):
-    """データ検証エラー"""
-    pass
-
-
 class PlanGenerationError(ApplicationException):
     """旅行プラン生成エラー"""
     pass
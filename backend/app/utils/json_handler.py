@@ -2,11 +2,11 @@
 JSON ログ管理
 """
 
-import json
 import asyncio
+import orjson
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List
 
 
 LOGS_DIR = Path(__file__).parent.parent.parent / "data" / "gemini_logs"
@@ -18,7 +18,12 @@ async def save_gemini_log(
     response_data: Dict[str, Any]
 ) -> None:
     """
-    Gemini API のリクエスト・レスポンスをJSONファイルに保存
+    Gemini API のリクエスト・レスポンスをJSONLファイルに追記
+    
+    plan_id は生成ごとに新しく採番されるため、ファイルは日付単位
+    （gemini_{YYYY-MM-DD}.jsonl）とし、各行に plan_id を含めて1行1ログで追記する。
+    あわせてプランごとのインデックス（{plan_id}.index）にタイムスタンプを追記し、
+    一覧取得をインデックスの読み込みだけで済ませる
     
     Args:
         plan_id (str): プラン ID
@@ -28,38 +33,92 @@ async def save_gemini_log(
     # ログディレクトリを確認
     LOGS_DIR.mkdir(parents=True, exist_ok=True)
     
-    # ファイル名: {plan_id}_{timestamp}.json
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = LOGS_DIR / f"{plan_id}_{timestamp}.json"
-    
-    # ログデータ構築
+    # ログデータ構築（plan_id を先頭に置く: 一覧取得時に行頭の比較だけで絞り込むため）
+    now = datetime.now()
     log_data = {
         "plan_id": plan_id,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now.isoformat(),
         "request": {
             "prompt": request_prompt
         },
         "response": response_data
     }
     
-    # 非同期でファイルに書き込み
+    # orjson で1行分の bytes を作り（C 実装のため短時間）、追記のみスレッドで実行
+    # 改行は OPT_APPEND_NEWLINE で付与（+ b"\n" による数百KBのコピーを避ける）
+    line = orjson.dumps(
+        log_data,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+    )
+    timestamp = log_data["timestamp"]
     await asyncio.to_thread(
-        _write_json_file,
-        filename,
-        log_data
+        _append_log,
+        _log_path(now.date().isoformat()),
+        line,
+        _index_path(plan_id),
+        f"{timestamp}\n".encode()
     )
 
 
-def _write_json_file(filepath: Path, data: Dict[str, Any]) -> None:
+def _log_path(day: str) -> Path:
+    """日付（YYYY-MM-DD）ごとのログファイルパス"""
+    return LOGS_DIR / f"gemini_{day}.jsonl"
+
+
+def _index_path(plan_id: str) -> Path:
+    """プランごとのインデックスファイルパス（1行1タイムスタンプ）"""
+    return LOGS_DIR / f"{plan_id}.index"
+
+
+def _append_log(log_path: Path, line: bytes, index_path: Path, index_line: bytes) -> None:
+    """
+    ログ本体とインデックスに追記（同期版）
+    
+    ログ本体の追記に失敗した場合はインデックスを更新しない
+    """
+    _append_line(log_path, line)
+    _append_line(index_path, index_line)
+
+
+def _read_index(plan_id: str) -> List[str]:
+    """インデックスからプランのログのタイムスタンプを読み込む（古い順）"""
+    index_path = _index_path(plan_id)
+    if not index_path.exists():
+        return []
+    return index_path.read_text(encoding="utf-8").splitlines()
+
+
+def _append_line(filepath: Path, line: bytes) -> None:
     """
-    JSON ファイルに書き込み（同期版）
+    ログファイルに1行追記（同期版）
     
     Args:
         filepath (Path): 書き込み先ファイルパス
-        data (Dict): 書き込みデータ
+        line (bytes): 改行付きの1行分のデータ
     """
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    with open(filepath, 'ab') as f:
+        f.write(line)
+
+
+def _iter_log_entries(plan_id: str, day: str) -> Iterator[Dict[str, Any]]:
+    """
+    指定日のプランのログを古い順に1件ずつ読み込む
+    
+    行頭の plan_id を bytes で比較し、対象プランの行だけをパースする
+    
+    Args:
+        plan_id (str): プラン ID
+        day (str): 対象日（YYYY-MM-DD）
+    """
+    prefix = orjson.dumps({"plan_id": plan_id})[:-1] + b","
+    filepath = _log_path(day)
+    if not filepath.exists():
+        return
+    
+    with open(filepath, 'rb') as f:
+        for line in f:
+            if line.startswith(prefix):
+                yield orjson.loads(line)
 
 
 def load_gemini_log(plan_id: str, timestamp: str) -> Dict[str, Any]:
@@ -68,33 +127,39 @@ def load_gemini_log(plan_id: str, timestamp: str) -> Dict[str, Any]:
     
     Args:
         plan_id (str): プラン ID
-        timestamp (str): タイムスタンプ
+        timestamp (str): タイムスタンプ（ログの "timestamp"。
+            旧形式の {plan_id}_{timestamp}.json のファイル名部分も可）
         
     Returns:
         Dict: ログデータ
         
     Raises:
-        FileNotFoundError: ログファイルが見つからない場合
+        FileNotFoundError: ログが見つからない場合
     """
-    filename = LOGS_DIR / f"{plan_id}_{timestamp}.json"
+    # ISO 形式のタイムスタンプなら先頭10文字が日付ファイルに対応する
+    for entry in _iter_log_entries(plan_id, timestamp[:10]):
+        if entry.get("timestamp") == timestamp:
+            return entry
     
-    if not filename.exists():
-        raise FileNotFoundError(f"ログファイルが見つかりません: {filename}")
+    # JSONL 化以前のログファイル（1ログ1ファイル）
+    legacy_file = LOGS_DIR / f"{plan_id}_{timestamp}.json"
+    if legacy_file.exists():
+        with open(legacy_file, 'rb') as f:
+            return orjson.loads(f.read())
     
-    with open(filename, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    raise FileNotFoundError(f"ログが見つかりません: {plan_id} ({timestamp})")
 
 
-def list_gemini_logs(plan_id: str) -> list:
+def list_gemini_logs(plan_id: str) -> List[str]:
     """
-    特定のプラン ID に対するすべてのログを列挙
+    特定のプラン ID に対するすべてのログのタイムスタンプを列挙
+    
+    インデックスファイルを1回読むだけで、ログ本体は開かない
     
     Args:
         plan_id (str): プラン ID
         
     Returns:
-        list: ログファイルのパスリスト
+        List[str]: ログのタイムスタンプリスト（古い順）
     """
-    if not LOGS_DIR.exists():
-        return []
-    return sorted(LOGS_DIR.glob(f"{plan_id}_*.json"))
+    return _read_index(plan_id)
@@ -2,10 +2,28 @@
 バリデーション関数
 """
 
-from datetime import datetime
+from datetime import date
 from ..models.travel_plan import TravelInput
 from .exceptions import ValidationError
 
+# 旅行入力の必須フィールド（インポート時に一度だけ構築）
+_REQUIRED_TRAVEL_FIELDS = ("origin", "destination", "start_date", "end_date", "budget")
+
+
+def _parse_date(value: str) -> date:
+    """
+    YYYY-MM-DD 形式の日付文字列をパース
+    
+    date.fromisoformat は C 実装で strptime より高速だが、Python 3.11 以降は
+    "20250101" などの ISO 8601 表記も受け付けるため、形式を先に確認する
+    
+    Raises:
+        ValueError: YYYY-MM-DD 形式でない場合
+    """
+    if len(value) != 10 or value[4] != "-" or value[7] != "-":
+        raise ValueError(f"不正な日付形式: {value}")
+    return date.fromisoformat(value)
+
 
 def validate_travel_input(data: dict) -> bool:
     """
@@ -21,16 +39,15 @@ def validate_travel_input(data: dict) -> bool:
         ValidationError: バリデーション失敗時
     """
     # 必須フィールド確認
-    required_fields = ["origin", "destination", "start_date", "end_date", "budget"]
-    for field in required_fields:
-        if field not in data or not data[field]:
+    for field in _REQUIRED_TRAVEL_FIELDS:
+        if not data.get(field):
             raise ValidationError(f"必須フィールド '{field}' がありません")
     
     # 日付形式確認
     try:
-        start = datetime.strptime(data["start_date"], "%Y-%m-%d")
-        end = datetime.strptime(data["end_date"], "%Y-%m-%d")
-    except ValueError:
+        start = _parse_date(data["start_date"])
+        end = _parse_date(data["end_date"])
+    except (TypeError, ValueError):
         raise ValidationError("日付形式は YYYY-MM-DD である必要があります")
     
     # 日付順序確認
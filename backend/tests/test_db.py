@@ -0,0 +1,166 @@
+"""
+test_db.py - データベースメンテナンステスト
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+import app.main as main_module
+from app.config import settings
+from app.database import db as db_module
+from app.models.db_models import (
+    Base,
+    TravelPlanDB,
+    TimelineItemHistory,
+    TimelineItemHistoryArchive,
+)
+from app.services.plan_storage_service import PlanStorageService
+
+
+@pytest.fixture
+def maintenance_db(tmp_path, monkeypatch):
+    """メンテナンス処理が使うエンジン・セッションを一時DBに差し替え"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(db_module, "engine", engine)
+    monkeypatch.setattr(db_module, "SessionLocal", session_local)
+    
+    yield session_local
+    
+    engine.dispose()
+
+
+def _add_plans(session_local, count: int, created_at: datetime, prefix: str = "plan") -> list:
+    """プランを count 件追加して plan_id を返す"""
+    plan_ids = [f"{prefix}-{i}" for i in range(count)]
+    with session_local() as db, db.begin():
+        db.add_all(
+            TravelPlanDB(
+                plan_id=plan_id,
+                input_data={},
+                schedules=[],
+                total_cost=0,
+                total_duration=0,
+                created_at=created_at
+            )
+            for plan_id in plan_ids
+        )
+    return plan_ids
+
+
+def _add_history(session_local, plan_id: str, count: int, created_at: datetime) -> None:
+    """編集履歴を count 件追加"""
+    with session_local() as db, db.begin():
+        db.add_all(
+            TimelineItemHistory(
+                plan_id=plan_id,
+                day=1,
+                item_index=i,
+                operation_type="update",
+                created_at=created_at
+            )
+            for i in range(count)
+        )
+
+
+def _history_items(session_local, model) -> list:
+    """編集履歴の (plan_id, item_index) 一覧"""
+    with session_local() as db:
+        return sorted(db.execute(select(model.plan_id, model.item_index)).all())
+
+
+def _count(session_local, model) -> int:
+    """テーブルの行数"""
+    with session_local() as db:
+        return db.execute(select(func.count()).select_from(model)).scalar()
+
+
+@pytest.mark.asyncio
+async def test_cleanup_old_plans_invalidates_count_cache(maintenance_db):
+    """正常系: 古いプランの自動削除後は概算プラン数も更新される"""
+    _add_plans(maintenance_db, 2, datetime.now() - timedelta(days=400), prefix="old")
+    _add_plans(maintenance_db, 1, datetime.now(), prefix="new")
+    
+    with maintenance_db() as db:
+        assert await PlanStorageService.count_plans(db, approximate=True) == 3
+        
+        assert db_module.cleanup_old_plans(days=365) == 2
+        
+        assert await PlanStorageService.count_plans(db, approximate=True) == 1
+
+
+def test_archive_old_history_moves_rows_once(maintenance_db, monkeypatch):
+    """正常系: 古い履歴だけが分割して1回ずつアーカイブへ移動し、欠落しない"""
+    monkeypatch.setattr(db_module, "IN_CLAUSE_CHUNK_SIZE", 2)
+    _add_history(maintenance_db, "plan-a", 5, datetime.now() - timedelta(days=100))
+    _add_history(maintenance_db, "plan-b", 3, datetime.now())
+    before = _history_items(maintenance_db, TimelineItemHistory)
+    
+    assert db_module.archive_old_history(days=90) == 5
+    assert db_module.archive_old_history(days=90) == 0
+    
+    archived = _history_items(maintenance_db, TimelineItemHistoryArchive)
+    remaining = _history_items(maintenance_db, TimelineItemHistory)
+    assert archived == [("plan-a", i) for i in range(5)]
+    assert remaining == [("plan-b", i) for i in range(3)]
+    assert sorted(archived + remaining) == before
+
+
+@pytest.mark.asyncio
+async def test_delete_plan_removes_archived_history(maintenance_db):
+    """正常系: プラン削除でアーカイブ済みの履歴も削除される"""
+    _add_plans(maintenance_db, 2, datetime.now())
+    for plan_id in ("plan-0", "plan-1"):
+        _add_history(maintenance_db, plan_id, 2, datetime.now() - timedelta(days=100))
+        _add_history(maintenance_db, plan_id, 1, datetime.now())
+    db_module.archive_old_history(days=90)
+    
+    with maintenance_db() as db:
+        await PlanStorageService.delete_plan("plan-0", db)
+    
+    assert {plan_id for plan_id, _ in _history_items(maintenance_db, TimelineItemHistory)} == {"plan-1"}
+    assert {plan_id for plan_id, _ in _history_items(maintenance_db, TimelineItemHistoryArchive)} == {"plan-1"}
+
+
+def test_cleanup_old_plans_chunked_delete(maintenance_db):
+    """正常系: 500件を超える削除は IN 句を分割し、アーカイブ済みの履歴も削除する"""
+    plan_ids = _add_plans(maintenance_db, 1200, datetime.now() - timedelta(days=400), prefix="old")
+    _add_plans(maintenance_db, 1, datetime.now(), prefix="new")
+    _add_history(maintenance_db, plan_ids[0], 2, datetime.now() - timedelta(days=100))
+    _add_history(maintenance_db, plan_ids[-1], 1, datetime.now())
+    db_module.archive_old_history(days=90)
+    
+    statements = []
+    
+    @event.listens_for(db_module.engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    assert db_module.cleanup_old_plans(days=365) == 1200
+    
+    plan_deletes = [sql for sql in statements if sql.startswith("DELETE FROM travel_plans")]
+    assert len(plan_deletes) == 3  # 500 + 500 + 200
+    assert _count(maintenance_db, TravelPlanDB) == 1
+    assert _count(maintenance_db, TimelineItemHistory) == 0
+    assert _count(maintenance_db, TimelineItemHistoryArchive) == 0
+
+
+def test_maintenance_disabled_when_interval_not_positive(monkeypatch):
+    """正常系: DB_MAINTENANCE_INTERVAL が 0 以下なら定期メンテナンスを起動しない"""
+    started = []
+    
+    async def _maintenance():
+        started.append(True)
+    
+    monkeypatch.setattr(settings, "DB_MAINTENANCE_INTERVAL", 0)
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+    monkeypatch.setattr(main_module, "init_db", lambda: None)
+    monkeypatch.setattr(main_module, "_periodic_maintenance", _maintenance)
+    
+    with TestClient(main_module.app):
+        pass
+    
+    assert started == []
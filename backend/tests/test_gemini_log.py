@@ -0,0 +1,89 @@
+"""
+test_gemini_log.py - Gemini ログ保存テスト
+"""
+
+import pytest
+import orjson
+from app.utils import json_handler
+from app.utils.json_handler import save_gemini_log, load_gemini_log, list_gemini_logs
+
+
+@pytest.fixture
+def logs_dir(tmp_path, monkeypatch):
+    """テスト用ログディレクトリ"""
+    monkeypatch.setattr(json_handler, "LOGS_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_save_gemini_log_appends_daily_file(logs_dir):
+    """正常系: 複数プランのログが同じ日付ファイルに1行ずつ追記される"""
+    await save_gemini_log("plan-a", "プロンプトA", {"text": "A"})
+    await save_gemini_log("plan-b", "プロンプトB", {"text": "B"})
+    await save_gemini_log("plan-a", "プロンプトA2", {"text": "A2"})
+    
+    files = list(logs_dir.glob("gemini_*.jsonl"))
+    assert len(files) == 1
+    
+    lines = files[0].read_bytes().splitlines()
+    assert [orjson.loads(line)["plan_id"] for line in lines] == ["plan-a", "plan-b", "plan-a"]
+
+
+@pytest.mark.asyncio
+async def test_load_gemini_log_round_trip(logs_dir):
+    """正常系: 一覧のタイムスタンプから保存したログを読み込める"""
+    await save_gemini_log("plan-a", "プロンプトA", {"text": "A"})
+    await save_gemini_log("plan-b", "プロンプトB", {"text": "B"})
+    await save_gemini_log("plan-a", "プロンプトA2", {"text": "A2"})
+    
+    timestamps = list_gemini_logs("plan-a")
+    assert len(timestamps) == 2
+    
+    log = load_gemini_log("plan-a", timestamps[1])
+    assert log["request"]["prompt"] == "プロンプトA2"
+    assert log["response"] == {"text": "A2"}
+    assert list_gemini_logs("plan-c") == []
+
+
+@pytest.mark.asyncio
+async def test_list_gemini_logs_reads_indexed_days_only(logs_dir):
+    """正常系: インデックスにない日付ファイルは読み込まない"""
+    await save_gemini_log("plan-a", "プロンプトA", {"text": "A"})
+    
+    # 読み込まれればパースに失敗する、別の日付のファイル
+    (logs_dir / "gemini_2000-01-01.jsonl").write_bytes(b'{"plan_id":"plan-a",broken\n')
+    
+    assert (logs_dir / "plan-a.index").exists()
+    timestamps = list_gemini_logs("plan-a")
+    assert len(timestamps) == 1
+    assert load_gemini_log("plan-a", timestamps[0])["response"] == {"text": "A"}
+
+
+@pytest.mark.asyncio
+async def test_list_gemini_logs_reads_index_only(logs_dir):
+    """正常系: 一覧取得ではログ本体を読み込まない"""
+    await save_gemini_log("plan-a", "プロンプトA", {"text": "A"})
+    await save_gemini_log("plan-a", "プロンプトA2", {"text": "A2"})
+    
+    # 読み込まれればパースに失敗する行を同じ日付ファイルに追記
+    day_file, = logs_dir.glob("gemini_*.jsonl")
+    with open(day_file, 'ab') as f:
+        f.write(b'{"plan_id":"plan-a",broken\n')
+    
+    timestamps = list_gemini_logs("plan-a")
+    assert len(timestamps) == 2
+    assert timestamps == sorted(timestamps)
+
+
+def test_load_gemini_log_legacy_file(logs_dir):
+    """正常系: JSONL 化以前の1ログ1ファイル形式も読み込める"""
+    legacy = {"plan_id": "plan-old", "response": {"text": "old"}}
+    (logs_dir / "plan-old_20250101_120000.json").write_bytes(orjson.dumps(legacy))
+    
+    assert load_gemini_log("plan-old", "20250101_120000") == legacy
+
+
+def test_load_gemini_log_not_found(logs_dir):
+    """異常系: ログがない場合は FileNotFoundError"""
+    with pytest.raises(FileNotFoundError):
+        load_gemini_log("plan-none", "2025-01-01T12:00:00")
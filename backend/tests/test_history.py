@@ -144,3 +144,36 @@ async def test_clear_history_success(test_db):
     # 確認
     count = await service.get_history_count("test-plan-5", test_db)
     assert count == 0
+
+
+@pytest.mark.asyncio
+async def test_record_batch_success(test_db):
+    """正常系: 編集操作を一括記録"""
+    service = HistoryService()
+    
+    ops = [
+        {"day": 1, "item_index": i, "operation_type": "update", "field_changed": "time"}
+        for i in range(4)
+    ]
+    history_ids = await service.record_batch("test-plan-6", ops, test_db)
+    
+    assert len(history_ids) == 4
+    
+    count = await service.get_history_count("test-plan-6", test_db)
+    assert count == 4
+
+
+@pytest.mark.asyncio
+async def test_record_edits_bulk_success(test_db):
+    """正常系: 複数プランの編集操作を一括記録"""
+    service = HistoryService()
+    
+    edits = [
+        {"plan_id": f"test-plan-bulk-{i % 2}", "day": 1, "item_index": i, "operation_type": "insert"}
+        for i in range(6)
+    ]
+    history_ids = await service.record_edits_bulk(edits, test_db)
+    
+    assert len(history_ids) == 6
+    assert await service.get_history_count("test-plan-bulk-0", test_db) == 3
+    assert await service.get_history_count("test-plan-bulk-1", test_db) == 3
@@ -0,0 +1,233 @@
+"""
+test_plan.py - プラン生成エンドポイントテスト
+"""
+
+import asyncio
+import pytest
+import orjson
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.models.travel_plan import TravelInput
+from app.services import plan_generator as plan_generator_module
+from app.services.gemini_service import get_gemini_service
+from app.services.plan_generator import get_plan_generator, PlanGeneratorService
+from app.utils.exceptions import GeminiAPIError, ValidationError
+
+TRAVEL_INPUT = {
+    "origin": "東京",
+    "destination": "京都",
+    "start_date": "2025-01-01",
+    "end_date": "2025-01-03",
+    "budget": 100000,
+    "interests": ["寺院"]
+}
+
+
+@pytest.fixture
+def client():
+    """テスト用クライアント（lifespan は実行しない）"""
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_generate_plan_generator_unavailable(client):
+    """異常系: プラン生成サービスを生成できない場合は 503"""
+    def _unavailable():
+        raise GeminiAPIError("GEMINI_API_KEY環境変数が設定されていません")
+    
+    app.dependency_overrides[get_plan_generator] = _unavailable
+    
+    response = client.post("/api/plans", json=TRAVEL_INPUT)
+    
+    assert response.status_code == 503
+    assert "GEMINI_API_KEY" in response.json()["detail"]
+
+
+def test_generate_plan_missing_api_key(client, monkeypatch):
+    """異常系: GEMINI_API_KEY 未設定時は 500 ではなく 503"""
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+    get_plan_generator.cache_clear()
+    get_gemini_service.cache_clear()
+    
+    try:
+        response = client.post("/api/plans", json=TRAVEL_INPUT)
+    finally:
+        get_plan_generator.cache_clear()
+        get_gemini_service.cache_clear()
+    
+    assert response.status_code == 503
+    assert "GEMINI_API_KEY" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("dates, message", [
+    ({"start_date": "2025-01-03", "end_date": "2025-01-01"}, "終了日は開始日以降"),
+    ({"start_date": "2025-02-30", "end_date": "2025-03-01"}, "存在しない日付"),
+])
+def test_generate_plan_invalid_dates(client, dates, message):
+    """異常系: 終了日が開始日より前・存在しない日付は 422"""
+    app.dependency_overrides[get_plan_generator] = lambda: None
+    
+    response = client.post("/api/plans", json={**TRAVEL_INPUT, **dates})
+    
+    assert response.status_code == 422
+    assert message in response.json()["detail"][0]["msg"]
+
+
+class StubGeminiService:
+    """GeminiService のスタブ（目的地を含むプランJSONを返し、呼び出し回数を記録）"""
+    
+    def __init__(self):
+        self.calls = 0
+        # 同時実行数（実行中 / 最大）
+        self.active = 0
+        self.max_active = 0
+        # この目的地に対しては time / activity の欠けた不正なタイムラインを返す
+        self.broken_destinations = set()
+    
+    async def generate_travel_plan(self, travel_input, plan_id):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            # 他のリクエストに実行を譲り、並行実行されるようにする
+            await asyncio.sleep(0.01)
+        finally:
+            self.active -= 1
+        timeline_item = {"time": "09:00", "activity": travel_input.destination}
+        if travel_input.destination in self.broken_destinations:
+            timeline_item = {"location": travel_input.destination}
+        return orjson.dumps({
+            "schedules": [{
+                "day": 1,
+                "date": travel_input.start_date,
+                "timeline": [timeline_item]
+            }],
+            "total_cost": travel_input.budget,
+            "total_duration": 600
+        }).decode()
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    """Gemini をスタブに差し替えた PlanGeneratorService"""
+    stub = StubGeminiService()
+    monkeypatch.setattr(plan_generator_module, "get_gemini_service", lambda: stub)
+    service = PlanGeneratorService()
+    service._plan_cache_size = 2
+    service._plan_cache_ttl = 3600
+    return service, stub
+
+
+def _travel_input(destination: str = "京都") -> TravelInput:
+    return TravelInput(**{**TRAVEL_INPUT, "destination": destination})
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_hit(generator):
+    """正常系: 同じ入力条件ではキャッシュを使い、Gemini を再度呼ばない"""
+    service, stub = generator
+    
+    first = await service.generate_plan(_travel_input())
+    second = await service.generate_plan(_travel_input())
+    
+    assert stub.calls == 1
+    assert second.schedules == first.schedules
+    assert second.plan_id != first.plan_id
+    
+    # 入力条件が異なれば別のプラン
+    other = await service.generate_plan(_travel_input("大阪"))
+    assert stub.calls == 2
+    assert other.schedules[0].timeline[0].activity == "大阪"
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_expiry(generator):
+    """正常系: 有効期限切れのエントリは使わず、再生成する"""
+    service, stub = generator
+    service._plan_cache_ttl = -1
+    
+    await service.generate_plan(_travel_input())
+    await service.generate_plan(_travel_input())
+    
+    assert stub.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_lru_eviction(generator):
+    """正常系: 上限を超えると最も使われていないエントリから削除する"""
+    service, stub = generator
+    
+    await service.generate_plan(_travel_input("京都"))
+    await service.generate_plan(_travel_input("大阪"))
+    await service.generate_plan(_travel_input("京都"))  # 京都を最新にする
+    await service.generate_plan(_travel_input("奈良"))  # 大阪が削除される
+    assert stub.calls == 3
+    
+    await service.generate_plan(_travel_input("京都"))
+    assert stub.calls == 3
+    
+    await service.generate_plan(_travel_input("大阪"))
+    assert stub.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_skips_invalid_response(generator):
+    """異常系: モデル変換に失敗したレスポンスはキャッシュせず、次回は再生成する"""
+    service, stub = generator
+    stub.broken_destinations.add("京都")
+    
+    with pytest.raises(ValidationError):
+        await service.generate_plan(_travel_input())
+    assert len(service._plan_cache) == 0
+    
+    stub.broken_destinations.clear()
+    plan = await service.generate_plan(_travel_input())
+    
+    assert stub.calls == 2
+    assert plan.schedules[0].timeline[0].activity == "京都"
+    assert len(service._plan_cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_generate_plans_batch_concurrent(generator):
+    """正常系: 同時実行数の上限内で並行生成し、入力と同じ順序で返す"""
+    service, stub = generator
+    service._plan_cache_size = 0
+    destinations = ["京都", "大阪", "奈良", "神戸"]
+    
+    results = await service.generate_plans_batch(
+        [_travel_input(destination) for destination in destinations],
+        concurrency=2
+    )
+    
+    assert stub.calls == 4
+    assert stub.max_active == 2
+    assert [plan.schedules[0].timeline[0].activity for plan in results] == destinations
+
+
+@pytest.mark.asyncio
+async def test_generate_plans_batch_partial_failure(generator):
+    """異常系: 失敗した入力だけが例外オブジェクトになり、他のプランは返る"""
+    service, stub = generator
+    stub.broken_destinations.add("大阪")
+    
+    results = await service.generate_plans_batch(
+        [_travel_input(destination) for destination in ["京都", "大阪", "奈良"]]
+    )
+    
+    assert isinstance(results[1], ValidationError)
+    assert results[0].schedules[0].timeline[0].activity == "京都"
+    assert results[2].schedules[0].timeline[0].activity == "奈良"
+    assert len(service._plan_cache) == 2
+
+
+def test_plan_cache_key_ignores_field_order():
+    """正常系: キャッシュキーはフィールドの指定順に依存せず、値が違えば異なる"""
+    reordered = TravelInput.model_validate(dict(reversed(list(TRAVEL_INPUT.items()))))
+    
+    assert PlanGeneratorService._cache_key(reordered) == PlanGeneratorService._cache_key(_travel_input())
+    assert PlanGeneratorService._cache_key(_travel_input("大阪")) != PlanGeneratorService._cache_key(_travel_input())
+    assert PlanGeneratorService._cache_key(
+        TravelInput(**{**TRAVEL_INPUT, "additional_notes": "駅の近く"})
+    ) != PlanGeneratorService._cache_key(_travel_input())
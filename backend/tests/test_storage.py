@@ -3,6 +3,7 @@ test_storage.py - ストレージサービステスト
 """
 
 import pytest
+import orjson
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.models.db_models import Base, TravelPlanDB
@@ -147,3 +148,167 @@ async def test_count_plans(test_db):
     count = await service.count_plans(test_db)
     
     assert count == 5
+
+
+@pytest.mark.asyncio
+async def test_upsert_plan_insert_then_update(test_db):
+    """正常系: UPSERT（新規作成→更新）"""
+    plan = TravelPlan(
+        plan_id="upsert-test",
+        input_data={"origin": "東京", "destination": "京都"},
+        schedules=[],
+        total_cost=50000,
+        total_duration=1440,
+        created_at=datetime.now()
+    )
+    
+    service = PlanStorageService()
+    created = await service.upsert_plan(plan, test_db)
+    assert created is True
+    
+    plan.total_cost = 60000
+    created = await service.upsert_plan(plan, test_db)
+    assert created is False
+    
+    # DB確認
+    saved_plans = test_db.query(TravelPlanDB).filter_by(plan_id="upsert-test").all()
+    assert len(saved_plans) == 1
+    assert saved_plans[0].total_cost == 60000
+
+
+@pytest.mark.asyncio
+async def test_upsert_plan_db_timestamps(test_db):
+    """正常系: UPSERT 時の作成・更新日時はDB側で設定される"""
+    plan = TravelPlan(
+        plan_id="upsert-timestamps",
+        input_data={},
+        schedules=[],
+        total_cost=0,
+        total_duration=0,
+        created_at=None
+    )
+    
+    service = PlanStorageService()
+    await service.upsert_plan(plan, test_db)
+    
+    saved = test_db.query(TravelPlanDB).filter_by(plan_id="upsert-timestamps").one()
+    assert saved.created_at is not None
+    assert saved.updated_at is not None
+    first_created_at = saved.created_at
+    
+    await service.upsert_plan(plan, test_db)
+    test_db.expire_all()
+    saved = test_db.query(TravelPlanDB).filter_by(plan_id="upsert-timestamps").one()
+    assert saved.created_at == first_created_at
+    assert saved.updated_at >= first_created_at
+
+
+@pytest.mark.asyncio
+async def test_get_all_plans_keyset(test_db):
+    """正常系: キーセットページングでプラン一覧取得"""
+    # 同時刻のプランを含むテストデータ追加
+    created_at = datetime(2025, 1, 1, 12, 0, 0)
+    for i in range(5):
+        plan = TravelPlanDB(
+            plan_id=f"keyset-{i}",
+            input_data={},
+            schedules=[],
+            total_cost=10000,
+            total_duration=1440,
+            created_at=created_at
+        )
+        test_db.add(plan)
+    test_db.commit()
+    
+    service = PlanStorageService()
+    first_page = await service.get_all_plans(test_db, limit=3)
+    last = first_page[-1]
+    second_page = await service.get_all_plans(
+        test_db,
+        limit=3,
+        before=datetime.fromisoformat(last["created_at"]),
+        before_id=last["plan_id"]
+    )
+    
+    plan_ids = [p["plan_id"] for p in first_page + second_page]
+    assert plan_ids == [f"keyset-{i}" for i in range(4, -1, -1)]
+
+
+@pytest.mark.asyncio
+async def test_get_all_plans_raw_json(test_db):
+    """正常系: JSONカラムを Fragment のまま取得しても同じ出力になる"""
+    plan = TravelPlanDB(
+        plan_id="raw-json-1",
+        input_data={"origin": "東京", "destination": "京都"},
+        schedules=[{"day": 1, "timeline": []}],
+        total_cost=10000,
+        total_duration=1440
+    )
+    test_db.add(plan)
+    test_db.commit()
+    
+    service = PlanStorageService()
+    decoded = await service.get_all_plans(test_db)
+    raw = await service.get_all_plans(test_db, raw_json=True)
+    
+    assert orjson.dumps(raw) == orjson.dumps(decoded)
+
+
+@pytest.mark.asyncio
+async def test_count_plans_approximate(test_db):
+    """正常系: 概算件数はキャッシュされ、サービス経由の保存で破棄される"""
+    service = PlanStorageService()
+    PlanStorageService._plan_count_cache.clear()
+    
+    assert await service.count_plans(test_db, approximate=True) == 0
+    
+    # サービスを経由しない追加はキャッシュ期間中は反映されない
+    test_db.add(TravelPlanDB(
+        plan_id="approx-1",
+        input_data={},
+        schedules=[],
+        total_cost=0,
+        total_duration=0
+    ))
+    test_db.commit()
+    assert await service.count_plans(test_db, approximate=True) == 0
+    assert await service.count_plans(test_db) == 1
+    # 正確な件数の取得はキャッシュを更新しない
+    assert await service.count_plans(test_db, approximate=True) == 0
+    
+    await service.save_plan(
+        TravelPlan(
+            plan_id="approx-2",
+            input_data={},
+            schedules=[],
+            total_cost=0,
+            total_duration=0
+        ),
+        test_db
+    )
+    assert await service.count_plans(test_db, approximate=True) == 2
+    
+    PlanStorageService._plan_count_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_get_all_plans_summary(test_db):
+    """正常系: 一覧用取得では schedules を含めない"""
+    plan = TravelPlanDB(
+        plan_id="summary-1",
+        input_data={"destination": "京都"},
+        schedules=[{"day": 1, "timeline": []}],
+        total_cost=10000,
+        total_duration=1440
+    )
+    test_db.add(plan)
+    test_db.commit()
+    test_db.expunge_all()
+    
+    service = PlanStorageService()
+    summary = await service.get_all_plans(test_db, include_schedules=False)
+    raw = await service.get_all_plans(test_db, raw_json=True, include_schedules=False)
+    
+    assert "schedules" not in summary[0]
+    assert summary[0]["input_data"] == {"destination": "京都"}
+    assert orjson.dumps(raw) == orjson.dumps(summary)
@@ -0,0 +1,183 @@
+"""
+test_weather.py - 天気サービステスト
+"""
+
+import time
+import pytest
+from app.services.weather_service import WeatherService
+
+
+def _forecast(code: int) -> dict:
+    """Open-Meteo 予報レスポンス（1日分）"""
+    return {
+        "latitude": 35.0,
+        "longitude": 135.0,
+        "timezone": "Asia/Tokyo",
+        "daily": {
+            "time": ["2025-01-01"],
+            "weather_code": [code],
+            "temperature_2m_max": [10.0],
+            "temperature_2m_min": [2.0],
+            "precipitation_sum": [0.0]
+        }
+    }
+
+
+class FakeResponse:
+    """aiohttp レスポンスのスタブ"""
+    
+    def __init__(self, status: int, data=None, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self._data = data
+    
+    async def json(self):
+        return self._data
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """aiohttp.ClientSession のスタブ（用意したレスポンスを順に返す）"""
+    
+    closed = False
+    
+    def __init__(self, *responses: FakeResponse):
+        self.responses = list(responses)
+        self.requests = []
+    
+    def get(self, url, params=None, headers=None):
+        self.requests.append({"url": url, "params": params, "headers": headers})
+        return self.responses.pop(0)
+
+
+def _service(*responses: FakeResponse):
+    """スタブセッションを組み込んだ WeatherService"""
+    service = WeatherService()
+    session = FakeSession(*responses)
+    service._session = session
+    return service, session
+
+
+def _expire(cache) -> None:
+    """キャッシュの全エントリを期限切れにする"""
+    for key, (_, value, validators) in list(cache.items()):
+        cache[key] = (0, value, validators)
+
+
+@pytest.mark.asyncio
+async def test_get_weather_304_refreshes_stale_entry():
+    """正常系: 期限切れエントリは条件付きリクエストで再検証し、304 なら再利用"""
+    service, session = _service(
+        FakeResponse(200, _forecast(0), {"ETag": '"v1"'}),
+        FakeResponse(304)
+    )
+    
+    first = await service.get_weather(35.0, 135.0)
+    _expire(service._weather_cache)
+    second = await service.get_weather(35.0, 135.0)
+    
+    assert second == first
+    assert session.requests[0]["headers"] is None
+    assert session.requests[1]["headers"] == {"If-None-Match": '"v1"'}
+    
+    # 有効期限が延長され、以降はリクエストしない
+    expires_at, _, validators = next(iter(service._weather_cache.values()))
+    assert expires_at > time.monotonic()
+    assert validators == {"If-None-Match": '"v1"'}
+    assert await service.get_weather(35.0, 135.0) == first
+    assert len(session.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_weather_200_replaces_stale_entry():
+    """正常系: 再検証で 200 が返った場合はエントリを置き換える"""
+    service, session = _service(
+        FakeResponse(200, _forecast(0), {"ETag": '"v1"'}),
+        FakeResponse(200, _forecast(3), {"ETag": '"v2"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"})
+    )
+    
+    await service.get_weather(35.0, 135.0)
+    _expire(service._weather_cache)
+    weather = await service.get_weather(35.0, 135.0)
+    
+    assert weather["forecast"][0]["weather_description"] == "曇り"
+    assert len(service._weather_cache) == 1
+    _, cached, validators = next(iter(service._weather_cache.values()))
+    assert cached == weather
+    assert validators == {
+        "If-None-Match": '"v2"',
+        "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_weather_304_without_stale_entry():
+    """異常系: キャッシュがないのに 304 が返った場合はエラー（キャッシュしない）"""
+    service, session = _service(FakeResponse(304))
+    
+    with pytest.raises(Exception, match="304"):
+        await service.get_weather(35.0, 135.0)
+    
+    assert len(service._weather_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_weather_shares_entry_for_nearby_coordinates():
+    """正常系: 小数点以下3桁で丸めて同じ座標になればキャッシュを共有"""
+    service, session = _service(
+        FakeResponse(200, _forecast(0)),
+        FakeResponse(200, _forecast(3))
+    )
+    
+    first = await service.get_weather(35.01234, 135.76811)
+    second = await service.get_weather(35.01241, 135.76794)
+    assert second == first
+    assert len(session.requests) == 1
+    
+    # 丸めた値が異なれば別エントリ
+    await service.get_weather(35.0135, 135.768)
+    assert len(session.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_location_coordinates_caches_not_found():
+    """正常系: 見つからなかった地名（None）もキャッシュし、再リクエストしない"""
+    service, session = _service(FakeResponse(200, {"results": []}))
+    
+    assert await service.get_location_coordinates("存在しない町") is None
+    assert await service.get_location_coordinates(" 存在しない町 ") is None
+    assert len(session.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_location_coordinates_normalizes_name():
+    """正常系: 前後の空白・大文字小文字が違う地名は同じエントリを使う"""
+    service, session = _service(
+        FakeResponse(200, {"results": [{"latitude": 35.0, "longitude": 135.7, "name": "Kyoto"}]})
+    )
+    
+    first = await service.get_location_coordinates("Kyoto")
+    assert await service.get_location_coordinates("  kyoto ") == first
+    assert first["latitude"] == 35.0
+    assert len(session.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_weather_result_changes_do_not_affect_cache():
+    """正常系: 返された辞書を変更してもキャッシュ済みの結果は変わらない"""
+    service, session = _service(FakeResponse(200, _forecast(0)))
+    
+    first = await service.get_weather(35.0, 135.0)
+    first["plan_id"] = "plan-a"
+    second = await service.get_weather(35.0, 135.0)
+    second["forecast"] = []
+    
+    third = await service.get_weather(35.0, 135.0)
+    assert "plan_id" not in third
+    assert len(third["forecast"]) == 1
+    assert len(session.requests) == 1